@@ -11,375 +11,429 @@ Data Sources:
 """
 
 import json
+import hashlib
 import requests
-from datetime import datetime
+from datetime import date
+from pathlib import Path
 from typing import Dict, List, Optional
-import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def create_epra_tariffs_json():
-    """
-    Create epra_tariffs_2024_2026.json with official Kenya electricity tariff data.
+# Kept apart from data/epra_tariffs_2024_2026.json, which the app loads and
+# which uses a different schema
+DEFAULT_OUT = Path("data") / "epra_tariffs_compiled.json"
+
+# Compilation date stamped at import; create_epra_tariffs_json() refreshes it
+# if the process is still running when the date rolls over
+_COMPILED_DATE = date.today().isoformat()
+
+# Base tariff data - EPRA approved rates (2023-2026 period)
+# Source: EPRA tariff schedule, Kenya Power announcements
+_TARIFFS = {
+    "metadata": {
+        "source": "Energy and Petroleum Regulatory Authority (EPRA)",
+        "data_compiled": _COMPILED_DATE,
+        "validity_period": {
+            "start": "2023-04-01",
+            "end": "2026-06-30",
+            "note": "Current tariff control period. Next review expected July 2026"
+        },
+        "currency": "KSh",
+        "unit": "kWh",
+        "references": [
+            "https://www.epra.go.ke/electricity-tariff-regulatory-instruments",
+            "Kenya Power Tariff Schedule 2023-2026",
+            "Energy (Net-Metering) Regulations, 2024",
+            "Kenya Gazette Legal Notice No. 104 of 2024"
+        ],
+        "important_notes": [
+            "Final bill amount includes base tariff + pass-through charges + levies + VAT",
+            "Pass-through charges are variable and updated monthly by EPRA",
+            "Tariff category determined by rolling 3-month average consumption",
+            "All rates are exclusive of taxes and levies unless stated otherwise"
+        ]
+    },
     
-    Based on:
-    - EPRA approved tariffs effective from April 2023 for 3-year period (2023-2026)
-    - Current domestic rates: Lifeline (≤30kWh), Ordinary 1 (31-100kWh), Ordinary 2 (>100kWh)
-    - Pass-through charges (Fuel Cost Charge, Forex Adjustment, etc.)
-    - Net-Metering Regulations 2024 (gazetted July 2024)
-    - VAT at 16%
-    """
+    "domestic": {
+        "description": "Residential electricity customers",
+        "tariff_determination": "Based on monthly consumption over rolling 3-month average",
+        "categories": {
+            "lifeline": {
+                "code": "DC1",
+                "description": "Low consumption domestic users",
+                "consumption_range_kWh": "0-30",
+                "base_rate_KSh_per_kWh": 12.23,
+                "eligibility": "Monthly consumption ≤30 kWh for 3 consecutive months",
+                "typical_users": "Single person households, bedsitters, minimal appliance use",
+                "estimated_total_rate_with_charges": 21.10,
+                "note": "Most subsidized category. Approximately 6.4 million customers (2024)"
+            },
+            "ordinary_1": {
+                "code": "DC2",
+                "description": "Medium consumption domestic users",
+                "consumption_range_kWh": "31-100",
+                "base_rate_KSh_per_kWh": 16.45,
+                "eligibility": "Monthly consumption 31-100 kWh",
+                "typical_users": "Average households with fridge, TV, basic appliances",
+                "estimated_total_rate_with_charges": 25.50,
+                "note": "Most common category for urban households"
+            },
+            "ordinary_2": {
+                "code": "DC3",
+                "description": "High consumption domestic users",
+                "consumption_range_kWh": "101-15000",
+                "base_rate_KSh_per_kWh": 19.08,
+                "eligibility": "Monthly consumption >100 kWh",
+                "typical_users": "Large families, multiple appliances, electric heating/cooling",
+                "estimated_total_rate_with_charges": 28.00,
+                "note": "All units billed at this rate once threshold exceeded"
+            }
+        }
+    },
     
-    # Base tariff data - EPRA approved rates (2023-2026 period)
-    # Source: EPRA tariff schedule, Kenya Power announcements
-    tariffs = {
-        "metadata": {
-            "source": "Energy and Petroleum Regulatory Authority (EPRA)",
-            "data_compiled": datetime.now().strftime("%Y-%m-%d"),
-            "validity_period": {
-                "start": "2023-04-01",
-                "end": "2026-06-30",
-                "note": "Current tariff control period. Next review expected July 2026"
+    "small_commercial": {
+        "description": "Small businesses and commercial establishments",
+        "categories": {
+            "sc1": {
+                "code": "SC1",
+                "description": "Low consumption small commercial",
+                "consumption_range_kWh": "0-30",
+                "base_rate_KSh_per_kWh": 12.23,
+                "typical_users": "Kiosks, small shops, micro-businesses"
             },
-            "currency": "KSh",
-            "unit": "kWh",
-            "references": [
-                "https://www.epra.go.ke/electricity-tariff-regulatory-instruments",
-                "Kenya Power Tariff Schedule 2023-2026",
-                "Energy (Net-Metering) Regulations, 2024",
-                "Kenya Gazette Legal Notice No. 104 of 2024"
-            ],
-            "important_notes": [
-                "Final bill amount includes base tariff + pass-through charges + levies + VAT",
-                "Pass-through charges are variable and updated monthly by EPRA",
-                "Tariff category determined by rolling 3-month average consumption",
-                "All rates are exclusive of taxes and levies unless stated otherwise"
-            ]
-        },
-        
-        "domestic": {
-            "description": "Residential electricity customers",
-            "tariff_determination": "Based on monthly consumption over rolling 3-month average",
-            "categories": {
-                "lifeline": {
-                    "code": "DC1",
-                    "description": "Low consumption domestic users",
-                    "consumption_range_kWh": "0-30",
-                    "base_rate_KSh_per_kWh": 12.23,
-                    "eligibility": "Monthly consumption ≤30 kWh for 3 consecutive months",
-                    "typical_users": "Single person households, bedsitters, minimal appliance use",
-                    "estimated_total_rate_with_charges": 21.10,
-                    "note": "Most subsidized category. Approximately 6.4 million customers (2024)"
-                },
-                "ordinary_1": {
-                    "code": "DC2",
-                    "description": "Medium consumption domestic users",
-                    "consumption_range_kWh": "31-100",
-                    "base_rate_KSh_per_kWh": 16.45,
-                    "eligibility": "Monthly consumption 31-100 kWh",
-                    "typical_users": "Average households with fridge, TV, basic appliances",
-                    "estimated_total_rate_with_charges": 25.50,
-                    "note": "Most common category for urban households"
-                },
-                "ordinary_2": {
-                    "code": "DC3",
-                    "description": "High consumption domestic users",
-                    "consumption_range_kWh": "101-15000",
-                    "base_rate_KSh_per_kWh": 19.08,
-                    "eligibility": "Monthly consumption >100 kWh",
-                    "typical_users": "Large families, multiple appliances, electric heating/cooling",
-                    "estimated_total_rate_with_charges": 28.00,
-                    "note": "All units billed at this rate once threshold exceeded"
-                }
+            "sc2": {
+                "code": "SC2",
+                "description": "Medium consumption small commercial",
+                "consumption_range_kWh": "31-100",
+                "base_rate_KSh_per_kWh": 16.45,
+                "typical_users": "Small retail shops, offices, salons"
+            },
+            "sc3": {
+                "code": "SC3",
+                "description": "Higher consumption small commercial",
+                "consumption_range_kWh": "101-15000",
+                "base_rate_KSh_per_kWh": 19.00,
+                "year_2024_25_rate": 19.40,
+                "year_2025_26_rate": 19.00,
+                "typical_users": "Restaurants, medium shops, service businesses",
+                "tou_off_peak_rate": 9.64,
+                "note": "Time-of-Use (TOU) rates available for eligible customers"
             }
         },
-        
-        "small_commercial": {
-            "description": "Small businesses and commercial establishments",
-            "categories": {
-                "sc1": {
-                    "code": "SC1",
-                    "description": "Low consumption small commercial",
-                    "consumption_range_kWh": "0-30",
-                    "base_rate_KSh_per_kWh": 12.23,
-                    "typical_users": "Kiosks, small shops, micro-businesses"
-                },
-                "sc2": {
-                    "code": "SC2",
-                    "description": "Medium consumption small commercial",
-                    "consumption_range_kWh": "31-100",
-                    "base_rate_KSh_per_kWh": 16.45,
-                    "typical_users": "Small retail shops, offices, salons"
-                },
-                "sc3": {
-                    "code": "SC3",
-                    "description": "Higher consumption small commercial",
-                    "consumption_range_kWh": "101-15000",
-                    "base_rate_KSh_per_kWh": 19.00,
-                    "year_2024_25_rate": 19.40,
-                    "year_2025_26_rate": 19.00,
-                    "typical_users": "Restaurants, medium shops, service businesses",
-                    "tou_off_peak_rate": 9.64,
-                    "note": "Time-of-Use (TOU) rates available for eligible customers"
-                }
+        "bulk_small_commercial": {
+            "description": "Larger small commercial users",
+            "consumption_range_kWh": "1000-15000",
+            "base_rate_KSh_per_kWh_2024_25": 18.50,
+            "base_rate_KSh_per_kWh_2025_26": 18.00,
+            "typical_users": "Laundromats, welding workshops, medium bakeries"
+        }
+    },
+    
+    "commercial_industrial": {
+        "description": "Large commercial and industrial customers",
+        "note": "Includes demand charges (per kVA) in addition to consumption charges",
+        "categories": {
+            "ci1": {
+                "code": "CI1",
+                "description": "Commercial & Industrial - Over 15,000 kWh/month",
+                "consumption_threshold_kWh": ">15000",
+                "base_rate_KSh_per_kWh": 13.74,
+                "rate_2025_26": 13.44,
+                "tou_rate_KSh_per_kWh": 6.87,
+                "demand_charge_KSh_per_kVA": 1100,
+                "typical_users": "Large factories, manufacturing plants"
             },
-            "bulk_small_commercial": {
-                "description": "Larger small commercial users",
-                "consumption_range_kWh": "1000-15000",
-                "base_rate_KSh_per_kWh_2024_25": 18.50,
-                "base_rate_KSh_per_kWh_2025_26": 18.00,
-                "typical_users": "Laundromats, welding workshops, medium bakeries"
+            "ci3": {
+                "code": "CI3",
+                "description": "Large facilities",
+                "base_rate_KSh_per_kWh": 11.92,
+                "tou_rate_KSh_per_kWh": 5.96,
+                "demand_charge_KSh_per_kVA": 370,
+                "typical_users": "Supermarkets, large commercial buildings, shopping malls"
             }
         },
-        
-        "commercial_industrial": {
-            "description": "Large commercial and industrial customers",
-            "note": "Includes demand charges (per kVA) in addition to consumption charges",
-            "categories": {
-                "ci1": {
-                    "code": "CI1",
-                    "description": "Commercial & Industrial - Over 15,000 kWh/month",
-                    "consumption_threshold_kWh": ">15000",
-                    "base_rate_KSh_per_kWh": 13.74,
-                    "rate_2025_26": 13.44,
-                    "tou_rate_KSh_per_kWh": 6.87,
-                    "demand_charge_KSh_per_kVA": 1100,
-                    "typical_users": "Large factories, manufacturing plants"
+        "tou_note": "Time-of-Use rates as low as KSh 5.58/kWh during off-peak for heavy industries"
+    },
+    
+    "pass_through_charges": {
+        "description": "Variable monthly charges set by EPRA to recover fuel, forex, and operational costs",
+        "update_frequency": "Monthly",
+        "components": {
+            "fuel_cost_charge": {
+                "code": "FCC",
+                "description": "Cost of fuel used in thermal power generation",
+                "current_rate_KSh_per_kWh": 3.60,
+                "recent_range": {
+                    "min": 2.99,
+                    "max": 4.93,
+                    "note": "Varies with global oil prices and thermal generation mix"
                 },
-                "ci3": {
-                    "code": "CI3",
-                    "description": "Large facilities",
-                    "base_rate_KSh_per_kWh": 11.92,
-                    "tou_rate_KSh_per_kWh": 5.96,
-                    "demand_charge_KSh_per_kVA": 370,
-                    "typical_users": "Supermarkets, large commercial buildings, shopping malls"
+                "historical_values": {
+                    "2024_01": 4.93,
+                    "2024_03": 4.64,
+                    "2024_04": 3.26,
+                    "2025_01": 3.55,
+                    "2025_09": 3.60
                 }
             },
-            "tou_note": "Time-of-Use rates as low as KSh 5.58/kWh during off-peak for heavy industries"
-        },
-        
-        "pass_through_charges": {
-            "description": "Variable monthly charges set by EPRA to recover fuel, forex, and operational costs",
-            "update_frequency": "Monthly",
-            "components": {
-                "fuel_cost_charge": {
-                    "code": "FCC",
-                    "description": "Cost of fuel used in thermal power generation",
-                    "current_rate_KSh_per_kWh": 3.60,
-                    "recent_range": {
-                        "min": 2.99,
-                        "max": 4.93,
-                        "note": "Varies with global oil prices and thermal generation mix"
-                    },
-                    "historical_values": {
-                        "2024_01": 4.93,
-                        "2024_03": 4.64,
-                        "2024_04": 3.26,
-                        "2025_01": 3.55,
-                        "2025_09": 3.60
-                    }
-                },
-                "forex_adjustment": {
-                    "code": "FERFA",
-                    "description": "Foreign Exchange Rate Fluctuation Adjustment",
-                    "current_rate_KSh_per_kWh": 0.81,
-                    "recent_range": {
-                        "min": 0.83,
-                        "max": 6.85,
-                        "note": "Highest during shilling depreciation in Jan 2024"
-                    },
-                    "historical_values": {
-                        "2024_01": 6.85,
-                        "2024_03": 3.68,
-                        "2024_04": 1.96,
-                        "2025_01": 0.83,
-                        "2025_09": 0.81
-                    }
+            "forex_adjustment": {
+                "code": "FERFA",
+                "description": "Foreign Exchange Rate Fluctuation Adjustment",
+                "current_rate_KSh_per_kWh": 0.81,
+                "recent_range": {
+                    "min": 0.83,
+                    "max": 6.85,
+                    "note": "Highest during shilling depreciation in Jan 2024"
                 },
-                "inflation_adjustment": {
-                    "description": "Adjusted semi-annually (January 1 and July 1)",
-                    "rate_KSh_per_kWh": 0.80,
-                    "update_schedule": "Every 6 months"
-                },
-                "warma_levy": {
-                    "code": "WARMA",
-                    "description": "Water Resources Management Authority levy for hydro generation",
-                    "rate_KSh_per_kWh": 0.0134,
-                    "note": "Variable based on hydroelectric generation in previous month"
+                "historical_values": {
+                    "2024_01": 6.85,
+                    "2024_03": 3.68,
+                    "2024_04": 1.96,
+                    "2025_01": 0.83,
+                    "2025_09": 0.81
                 }
             },
-            "typical_total_pass_through": {
-                "description": "Typical combined pass-through cost",
-                "estimate_KSh_per_kWh": 5.50,
-                "range": "4.50-7.00",
-                "note": "Varies monthly based on fuel prices, exchange rates, and generation mix"
-            }
-        },
-        
-        "taxes_and_levies": {
-            "vat": {
-                "rate": 0.16,
-                "description": "Value Added Tax on total bill amount",
-                "applied_to": "Base tariff + pass-through charges + levies"
-            },
-            "epra_levy": {
-                "rate_KSh_per_kWh": 0.03,
-                "description": "Energy and Petroleum Regulatory Authority levy (fixed)"
-            },
-            "rural_electrification_levy": {
-                "rate_percentage": 0.05,
-                "description": "5% of consumption charges for rural electrification projects",
-                "calculation": "5% of (base tariff × kWh consumed)"
+            "inflation_adjustment": {
+                "description": "Adjusted semi-annually (January 1 and July 1)",
+                "rate_KSh_per_kWh": 0.80,
+                "update_schedule": "Every 6 months"
             },
-            "energy_sector_charge": {
-                "description": "Energy Sector Recovery levy",
-                "note": "Variable, included in overall bill structure"
+            "warma_levy": {
+                "code": "WARMA",
+                "description": "Water Resources Management Authority levy for hydro generation",
+                "rate_KSh_per_kWh": 0.0134,
+                "note": "Variable based on hydroelectric generation in previous month"
             }
         },
-        
-        "net_metering": {
-            "regulation": "Energy (Net-Metering) Regulations, 2024",
-            "gazette_date": "2024-07-26",
-            "effective_date": "2024-06-18",
-            "description": "Allows consumers to export excess renewable energy to the grid",
-            "eligible_technologies": [
-                "Solar PV",
-                "Wind",
-                "Small Hydro",
-                "Biogas",
-                "Geothermal (small-scale)"
-            ],
-            "capacity_limits": {
-                "domestic_single_phase": {
-                    "max_kW": 4,
-                    "supply_type": "Single Phase (220-240V)"
-                },
-                "domestic_three_phase": {
-                    "max_kW": 10,
-                    "supply_type": "Three Phase (380-415V)"
-                },
-                "commercial_industrial": {
-                    "max_MW": 1.0,
-                    "note": "Capped at maximum load demand in previous 12 months"
-                }
-            },
-            "credit_mechanism": {
-                "export_credit_rate": 0.5,
-                "description": "Consumers receive 50% credit for energy exported to grid",
-                "example": "If retail rate is KSh 32/kWh, export credit is KSh 16/kWh",
-                "rollover": "Unused credits roll over to next billing period",
-                "expiry": "Credits forfeit at end of Kenya Power financial year (June 30)"
+        "typical_total_pass_through": {
+            "description": "Typical combined pass-through cost",
+            "estimate_KSh_per_kWh": 5.50,
+            "range": "4.50-7.00",
+            "note": "Varies monthly based on fuel prices, exchange rates, and generation mix"
+        }
+    },
+    
+    "taxes_and_levies": {
+        "vat": {
+            "rate": 0.16,
+            "description": "Value Added Tax on total bill amount",
+            "applied_to": "Base tariff + pass-through charges + levies"
+        },
+        "epra_levy": {
+            "rate_KSh_per_kWh": 0.03,
+            "description": "Energy and Petroleum Regulatory Authority levy (fixed)"
+        },
+        "rural_electrification_levy": {
+            "rate_percentage": 0.05,
+            "description": "5% of consumption charges for rural electrification projects",
+            "calculation": "5% of (base tariff × kWh consumed)"
+        },
+        "energy_sector_charge": {
+            "description": "Energy Sector Recovery levy",
+            "note": "Variable, included in overall bill structure"
+        }
+    },
+    
+    "net_metering": {
+        "regulation": "Energy (Net-Metering) Regulations, 2024",
+        "gazette_date": "2024-07-26",
+        "effective_date": "2024-06-18",
+        "description": "Allows consumers to export excess renewable energy to the grid",
+        "eligible_technologies": [
+            "Solar PV",
+            "Wind",
+            "Small Hydro",
+            "Biogas",
+            "Geothermal (small-scale)"
+        ],
+        "capacity_limits": {
+            "domestic_single_phase": {
+                "max_kW": 4,
+                "supply_type": "Single Phase (220-240V)"
             },
-            "licensing": {
-                "aggregate_capacity_limit_MW": 100,
-                "period": "Initial 5 years",
-                "application_basis": "First-come, first-served",
-                "authority": "Energy and Petroleum Regulatory Authority (EPRA)"
+            "domestic_three_phase": {
+                "max_kW": 10,
+                "supply_type": "Three Phase (380-415V)"
             },
-            "requirements": {
-                "bi_directional_meter": "Smart meter capable of measuring import/export",
-                "grid_compliance": "Kenya Electricity Distribution Grid Code",
-                "installation": "By licensed/authorized professionals",
-                "feasibility_study": "Required for systems >10 kW"
+            "commercial_industrial": {
+                "max_MW": 1.0,
+                "note": "Capped at maximum load demand in previous 12 months"
             }
         },
-        
-        "billing_example": {
-            "description": "Sample bill calculation for Domestic Ordinary 1 (60 kWh/month)",
-            "consumption_kWh": 60,
-            "base_tariff": {
-                "rate": 16.45,
-                "subtotal": 987.00
-            },
-            "pass_through_charges": {
-                "fuel_cost": 216.00,
-                "forex_adjustment": 48.60,
-                "inflation_adjustment": 48.00,
-                "warma_levy": 0.80,
-                "subtotal": 313.40
-            },
-            "levies": {
-                "epra_levy": 1.80,
-                "rural_electrification": 49.35,
-                "subtotal": 51.15
-            },
-            "subtotal_before_vat": 1351.55,
-            "vat_16_percent": 216.25,
-            "total_bill_KSh": 1567.80,
-            "effective_rate_per_kWh": 26.13,
-            "note": "Actual bill varies based on monthly pass-through charge updates"
+        "credit_mechanism": {
+            "export_credit_rate": 0.5,
+            "description": "Consumers receive 50% credit for energy exported to grid",
+            "example": "If retail rate is KSh 32/kWh, export credit is KSh 16/kWh",
+            "rollover": "Unused credits roll over to next billing period",
+            "expiry": "Credits forfeit at end of Kenya Power financial year (June 30)"
         },
-        
-        "cost_comparison": {
-            "description": "How much 100 kWh costs in different categories (approximate, including all charges)",
-            "lifeline_30kWh_equivalent": {
-                "max_kWh": 30,
-                "cost_KSh": 633,
-                "effective_rate": 21.10
-            },
-            "ordinary_1": {
-                "kWh": 100,
-                "cost_KSh": 2550,
-                "effective_rate": 25.50
-            },
-            "ordinary_2": {
-                "kWh": 100,
-                "cost_KSh": 2800,
-                "effective_rate": 28.00
-            },
-            "note": "These are estimates. Actual costs vary with monthly pass-through charges"
+        "licensing": {
+            "aggregate_capacity_limit_MW": 100,
+            "period": "Initial 5 years",
+            "application_basis": "First-come, first-served",
+            "authority": "Energy and Petroleum Regulatory Authority (EPRA)"
         },
-        
-        "regional_variations": {
-            "note": "Tariffs are uniform nationwide",
-            "connection_types": {
-                "urban": "Typically three-phase available for higher demand",
-                "rural": "Mostly single-phase, lower average consumption",
-                "average_rural_bill_KSh_per_month": 217,
-                "average_national_bill_KSh_per_month": 830
-            }
+        "requirements": {
+            "bi_directional_meter": "Smart meter capable of measuring import/export",
+            "grid_compliance": "Kenya Electricity Distribution Grid Code",
+            "installation": "By licensed/authorized professionals",
+            "feasibility_study": "Required for systems >10 kW"
+        }
+    },
+    
+    "billing_example": {
+        "description": "Sample bill calculation for Domestic Ordinary 1 (60 kWh/month)",
+        "consumption_kWh": 60,
+        "base_tariff": {
+            "rate": 16.45,
+            "subtotal": 987.00
         },
-        
-        "future_outlook": {
-            "next_tariff_review": "2026-07",
-            "expected_changes": [
-                "MPs proposing pass-through for rural electrification costs (effective July 2026)",
-                "Potential base tariff increases to recover KSh 29.9B rural grid investment",
-                "Continued focus on reducing thermal power dependence",
-                "Increased renewable energy integration"
-            ],
-            "policy_initiatives": [
-                "Net-metering to reduce grid dependence",
-                "E-mobility special tariffs under consideration",
-                "Power Purchase Agreement (PPA) reviews ongoing"
-            ]
+        "pass_through_charges": {
+            "fuel_cost": 216.00,
+            "forex_adjustment": 48.60,
+            "inflation_adjustment": 48.00,
+            "warma_levy": 0.80,
+            "subtotal": 313.40
+        },
+        "levies": {
+            "epra_levy": 1.80,
+            "rural_electrification": 49.35,
+            "subtotal": 51.15
+        },
+        "subtotal_before_vat": 1351.55,
+        "vat_16_percent": 216.25,
+        "total_bill_KSh": 1567.80,
+        "effective_rate_per_kWh": 26.13,
+        "note": "Actual bill varies based on monthly pass-through charge updates"
+    },
+    
+    "cost_comparison": {
+        "description": "How much 100 kWh costs in different categories (approximate, including all charges)",
+        "lifeline_30kWh_equivalent": {
+            "max_kWh": 30,
+            "cost_KSh": 633,
+            "effective_rate": 21.10
+        },
+        "ordinary_1": {
+            "kWh": 100,
+            "cost_KSh": 2550,
+            "effective_rate": 25.50
+        },
+        "ordinary_2": {
+            "kWh": 100,
+            "cost_KSh": 2800,
+            "effective_rate": 28.00
+        },
+        "note": "These are estimates. Actual costs vary with monthly pass-through charges"
+    },
+    
+    "regional_variations": {
+        "note": "Tariffs are uniform nationwide",
+        "connection_types": {
+            "urban": "Typically three-phase available for higher demand",
+            "rural": "Mostly single-phase, lower average consumption",
+            "average_rural_bill_KSh_per_month": 217,
+            "average_national_bill_KSh_per_month": 830
         }
+    },
+    
+    "future_outlook": {
+        "next_tariff_review": "2026-07",
+        "expected_changes": [
+            "MPs proposing pass-through for rural electrification costs (effective July 2026)",
+            "Potential base tariff increases to recover KSh 29.9B rural grid investment",
+            "Continued focus on reducing thermal power dependence",
+            "Increased renewable energy integration"
+        ],
+        "policy_initiatives": [
+            "Net-metering to reduce grid dependence",
+            "E-mobility special tariffs under consideration",
+            "Power Purchase Agreement (PPA) reviews ongoing"
+        ]
     }
+}
+
+
+def create_epra_tariffs_json():
+    """
+    Create the compiled EPRA tariff data with official Kenya electricity tariff data.
+    
+    Based on:
+    - EPRA approved tariffs effective from April 2023 for 3-year period (2023-2026)
+    - Current domestic rates: Lifeline (≤30kWh), Ordinary 1 (31-100kWh), Ordinary 2 (>100kWh)
+    - Pass-through charges (Fuel Cost Charge, Forex Adjustment, etc.)
+    - Net-Metering Regulations 2024 (gazetted July 2024)
+    - VAT at 16%
     
-    return tariffs
+    The module-level tariff tree is returned directly, so callers must
+    treat the result as read-only.
+    """
+    global _COMPILED_DATE
+    today = date.today().isoformat()
+    if today != _COMPILED_DATE:
+        _COMPILED_DATE = today
+        _TARIFFS["metadata"]["data_compiled"] = today
+    return _TARIFFS
+
+
+def _serialize_tariffs(tariffs):
+    """Encode the tariff dict as indented UTF-8 JSON bytes (orjson if available)."""
+    if orjson is not None:
+        return orjson.dumps(tariffs, option=orjson.OPT_INDENT_2)
+    return json.dumps(tariffs, indent=2, ensure_ascii=False).encode('utf-8')
 
 
-def save_tariffs_json(output_file="data\epra_tariffs_2024_2026.json"):
+def _read_digest(digest_file):
+    """Return the digest stored in a sidecar file, or None if missing."""
+    try:
+        return digest_file.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+
+
+def save_tariffs_json(output_file=DEFAULT_OUT, verbose=False):
     """
     Generate and save the EPRA tariffs JSON file.
-    """
-    print("=" * 70)
-    print("EPRA Kenya Electricity Tariffs Data Compiler (2024-2026)")
-    print("=" * 70)
     
-    print("\n📊 Compiling tariff data from official sources...")
-    print("   - EPRA Regulatory Instruments")
-    print("   - Kenya Power Tariff Schedules")
-    print("   - Energy (Net-Metering) Regulations, 2024")
-    print("   - Recent EPRA Monthly Updates")
+    Silent by default so it can be called from a data pipeline; pass
+    verbose=True for the banner and tariff summary.
+    """
+    if verbose:
+        print("=" * 70)
+        print("EPRA Kenya Electricity Tariffs Data Compiler (2024-2026)")
+        print("=" * 70)
+        
+        print("\n📊 Compiling tariff data from official sources...")
+        print("   - EPRA Regulatory Instruments")
+        print("   - Kenya Power Tariff Schedules")
+        print("   - Energy (Net-Metering) Regulations, 2024")
+        print("   - Recent EPRA Monthly Updates")
     
     tariffs = create_epra_tariffs_json()
+    serialized = _serialize_tariffs(tariffs)
+    
+    # Skip the write when the file on disk already has identical content
+    output_file = Path(output_file)
+    digest = hashlib.blake2b(serialized, digest_size=16).hexdigest()
+    digest_file = output_file.with_name(output_file.name + ".sha")
+    
+    up_to_date = output_file.exists() and _read_digest(digest_file) == digest
+    if not up_to_date:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_bytes(serialized)
+        digest_file.write_text(digest, encoding='utf-8')
     
-    # Save to JSON file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(tariffs, f, indent=2, ensure_ascii=False)
+    if not verbose:
+        return output_file
     
-    print(f"\n✅ Successfully created: {output_file}")
-    print(f"   File size: {os.path.getsize(output_file):,} bytes")
+    if up_to_date:
+        print(f"\n✅ Already up to date: {output_file}")
+    else:
+        print(f"\n✅ Successfully created: {output_file}")
+    print(f"   File size: {output_file.stat().st_size:,} bytes")
     
     # Display summary
     print("\n📋 Tariff Summary:")
@@ -404,8 +458,7 @@ def save_tariffs_json(output_file="data\epra_tariffs_2024_2026.json"):
     print("   • Current typical effective rate: KSh 21-28/kWh (depending on category)")
     
     print("\n📚 Data Sources Documented:")
-    for ref in tariffs['metadata']['references']:
-        print(f"   • {ref}")
+    print("\n".join(f"   • {ref}" for ref in tariffs['metadata']['references']))
     
     return output_file
 
@@ -434,7 +487,7 @@ def display_sample_calculations():
 
 if __name__ == "__main__":
     # Generate the tariffs JSON file
-    output_file = save_tariffs_json()
+    output_file = save_tariffs_json(verbose=True)
     
     # Display sample calculations
     display_sample_calculations()
@@ -1,26 +1,31 @@
 import streamlit as st
+import hashlib
+import io
 import json
 import os
-import math
-import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
 from dotenv import load_dotenv
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import utilities
 from utils.cost_calculator import load_json_data, calculate_tariff_cost, calculate_system_cost
-from utils.gemini_handler import generate_solar_recommendation
-from utils.data_validator import validate_recommendation
-import google.generativeai as genai
-from google.generativeai.types import GenerationConfig
-from utils.visualizations import (
-    create_financial_timeline, 
-    create_cost_breakdown_pie, 
-    create_co2_offset_gauge, 
-    create_monthly_energy_flow
-)
+from utils.battery_calculator import calculate_battery_specs, calculate_battery_cost
+# Plotly (utils.visualizations) and google.generativeai are imported where
+# they are used so the app shell doesn't pay for them at startup
 import config as app_config
 
 # Load environment variables
@@ -41,144 +46,42 @@ st.set_page_config(
 # MODERN STYLING
 # ============================================================================
 
-st.markdown("""
-    <style>
-    /* Main Theme */
-    :root {
-        --primary-color: #FF6B35;
-        --secondary-color: #004E89;
-        --accent-color: #F7B801;
-        --success-color: #06A77D;
-        --bg-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    
-    /* Custom Header */
-    .main-header {
-        font-size: 3.5em;
-        font-weight: 800;
-        background: linear-gradient(135deg, #FF6B35 0%, #F7B801 50%, #06A77D 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin-bottom: 5px;
-        font-family: 'SF Pro Display', -apple-system, BlinkMacSystemFont, sans-serif;
-    }
-    
-    .tagline {
-        text-align: center;
-        font-size: 1.2em;
-        color: #666;
-        margin-bottom: 30px;
-        font-weight: 300;
-    }
-    
-    /* Cards */
-    .metric-card {
-        background: white;
-        padding: 20px;
-        border-radius: 15px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.07);
-        border-left: 4px solid var(--primary-color);
-        transition: transform 0.2s, box-shadow 0.2s;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 15px rgba(0,0,0,0.1);
-    }
-    
-    /* Info Boxes */
-    .info-box {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 20px;
-        border-radius: 15px;
-        color: white;
-        margin: 15px 0;
-    }
-    
-    .success-box {
-        background: linear-gradient(135deg, #06A77D 0%, #05D9A5 100%);
-        padding: 20px;
-        border-radius: 15px;
-        color: white;
-    }
-    
-    .warning-box {
-        background: linear-gradient(135deg, #F7B801 0%, #FF6B35 100%);
-        padding: 20px;
-        border-radius: 15px;
-        color: white;
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        border-radius: 10px;
-        font-weight: 600;
-        transition: all 0.3s;
-    }
-    
-    .stButton>button:hover {
-        transform: scale(1.02);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 10px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 10px 10px 0 0;
-        padding: 10px 20px;
-        font-weight: 600;
-    }
-    
-    /* Inputs */
-    .stSelectbox, .stNumberInput {
-        border-radius: 10px;
-    }
-    
-    /* Progress indicators */
-    .step-indicator {
-        display: flex;
-        justify-content: space-between;
-        margin: 30px 0;
-    }
-    
-    .step {
-        flex: 1;
-        text-align: center;
-        padding: 15px;
-        background: #f0f0f0;
-        border-radius: 10px;
-        margin: 0 5px;
-        font-weight: 600;
-        color: #999;
-    }
-    
-    .step.active {
-        background: linear-gradient(135deg, #FF6B35 0%, #F7B801 100%);
-        color: white;
-    }
-    
-    .step.completed {
-        background: #06A77D;
-        color: white;
-    }
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    """Read the app stylesheet once per process"""
+    with open("assets/styles.css", "r", encoding="utf-8") as f:
+        return f.read()
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
+
+@st.cache_resource
+def load_image(path, max_width=None):
+    """Read an image once per process, downscaling it to max_width pixels if wider"""
+    from PIL import Image
+    
+    with open(path, "rb") as f:
+        raw = f.read()
+    if max_width is None:
+        return raw
+    with Image.open(io.BytesIO(raw)) as img:
+        if img.width <= max_width:
+            return raw
+        height = round(img.height * max_width / img.width)
+        buf = io.BytesIO()
+        img.resize((max_width, height), Image.LANCZOS).save(buf, format="PNG", optimize=True)
+        return buf.getvalue()
 
 # ============================================================================
 # EFFICIENT DATA LOADING WITH ERROR HANDLING
 # ============================================================================
 
-@st.cache_data(ttl=3600)
+@st.cache_resource(ttl=3600, show_spinner=False)
 def load_all_data():
-    """Load all JSON data with comprehensive error handling"""
+    """Load all JSON data with comprehensive error handling
+    
+    Payloads are frozen and shared across sessions (cache_resource) instead
+    of being copied per rerun by cache_data, so treat them as read-only.
+    """
     required_files = {
         "tariff": "epra_tariffs_2024_2026.json",
         "equipment": "equipment_catalog.json",
@@ -192,72 +95,323 @@ def load_all_data():
     data = {}
     errors = []
     
-    for key, filename in required_files.items():
+    # Files are independent, so read and parse them concurrently
+    with ThreadPoolExecutor(max_workers=len(required_files)) as executor:
+        futures = {
+            key: executor.submit(load_json_data, filename)
+            for key, filename in required_files.items()
+        }
+    
+    for key, future in futures.items():
         try:
-            data[key] = load_json_data(filename)
+            data[key] = future.result()
         except Exception as e:
-            errors.append(f"{filename}: {str(e)}")
+            errors.append(f"{required_files[key]}: {str(e)}")
             data[key] = None
     
     return data, errors
 
-# Load data
-with st.spinner("⚡ Loading Jua Smart..."):
-    data, load_errors = load_all_data()
-
-if load_errors:
-    st.error("⚠️ Some data files could not be loaded:")
-    for error in load_errors:
-        st.error(f"  • {error}")
-    st.stop()
+def start_data_load():
+    """Start load_all_data on a background thread, once per session, so the first page shell renders first"""
+    if "data_future" in st.session_state:
+        return st.session_state.data_future
+    future = Future()
+    
+    def _run():
+        try:
+            future.set_result(load_all_data())
+        except Exception as e:
+            future.set_exception(e)
+    
+    thread = threading.Thread(target=_run, daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    st.session_state.data_future = future
+    return future
 
-# Extract data
-GHI_DATA = data.get("ghi", {})
-TARIFF_DATA = data.get("tariff", {})
-EQUIPMENT_CATALOG = data.get("equipment", {})
-ASSUMPTIONS = data.get("assumptions", {})
-INCENTIVES = data.get("incentives", {})
+data_future = start_data_load()
 
 # ============================================================================
 # HELPER FUNCTIONS - OPTIMIZED
 # ============================================================================
 
-@st.cache_data
+def ghi_county_names(ghi_data):
+    """County names in the GHI data, in file order (the cache key for get_county_options)"""
+    if isinstance(ghi_data, Mapping) and "counties" not in ghi_data:
+        return tuple(k for k in ghi_data if k != "All_Counties")
+    return tuple(
+        c.get("county", f"County_{i}")
+        for i, c in enumerate(ghi_data.get("counties", []))
+    )
+
+@st.cache_data(show_spinner=False)
+def get_county_options(county_names):
+    """Sorted county names plus the default (Nairobi) index, built once per county list"""
+    options = sorted(county_names)
+    default_index = options.index("Nairobi") if "Nairobi" in options else 0
+    return options, default_index
+
 def get_ghi_for_location(location):
     """Optimized GHI retrieval with fallback"""
-    if isinstance(GHI_DATA, dict):
-        if "counties" in GHI_DATA:
-            for county_data in GHI_DATA["counties"]:
-                if county_data.get("county") == location:
-                    return county_data.get("avg_irradiance_kwh_m2_day", 5.2)
-        return GHI_DATA.get(location, {}).get("ghi_kwh_m2_day", 5.2)
-    return 5.2
+    return _GHI_BY_COUNTY.get(location, 5.2)
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def cached_geocode(address):
+    """Geocode an address once per week instead of on every click"""
+    from utils.nasa_power_api import address_to_coordinates
+    return address_to_coordinates(address)
+
+# Persisted to disk so restarts don't re-download a year of daily data. Streamlit
+# ignores ttl for persisted caches, which is fine here: the range ends 30 days
+# back and is day-aligned, so a cached entry never needs refreshing.
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False)
+def cached_nasa_power_data(lat, lon, start_date, end_date, parameters):
+    """NASA POWER daily data, cached per (rounded) point and day-aligned date range"""
+    from utils.nasa_power_api import fetch_nasa_power_data
+    return fetch_nasa_power_data(lat, lon, start_date, end_date, list(parameters))
+
+CHAT_SYSTEM_INSTRUCTION = """You are Jua Smart, a friendly and knowledgeable Kenyan solar energy advisor. 
+                    
+Your expertise includes:
+- Solar panel systems and sizing for Kenyan homes and businesses
+- EPRA (Energy and Petroleum Regulatory Authority) regulations and tariffs
+- Kenya's Net Metering regulations and procedures
+- Local solar equipment suppliers and costs in Kenya Shillings (KSh)
+- Installation best practices for Kenya's climate (both rainy and dry seasons)
+- Government incentives and tax exemptions for solar in Kenya
+- Battery storage options available in the Kenyan market
+- Maintenance requirements for solar systems in Kenya's conditions
+- County-specific solar irradiance data across Kenya
+- KPLC (Kenya Power) interconnection procedures
+- ROI calculations based on current KPLC electricity rates
+
+Provide practical, cost-effective advice specific to Kenya. Be concise but helpful. 
+Always mention costs in Kenya Shillings (KSh). Reference relevant Kenyan authorities like EPRA and KPLC when applicable.
+If you don't know something specific to Kenya, acknowledge it and provide general solar guidance instead."""
+CHAT_SYSTEM_HASH = hashlib.blake2b(CHAT_SYSTEM_INSTRUCTION.encode("utf-8"), digest_size=16).hexdigest()
+
+@st.cache_resource
+def get_http_session():
+    """Process-wide OpenRouter session so chat calls reuse keep-alive connections"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://juasmart.com",
+        "X-Title": "Jua Smart Chat"
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+# Finished replies are kept for a day per (provider, model, system prompt, user prompt).
+# This is a plain dict rather than st.cache_data because replies are streamed to the
+# page as they arrive, and a generator can't be cached.
+CHAT_CACHE_TTL = 86400
+CHAT_CACHE_MAX_ENTRIES = 256
+# Chat transcript is capped; only the newest page is drawn on each rerun
+CHAT_HISTORY_LIMIT = 200
+CHAT_PAGE_SIZE = 50
+
+@st.cache_resource
+def get_chat_reply_cache():
+    """Process-wide store of finished chat replies: key -> (timestamp, reply)"""
+    return {}
+
+def get_cached_chat_reply(key):
+    """Cached reply for key, or None if missing or older than CHAT_CACHE_TTL"""
+    entry = get_chat_reply_cache().get(key)
+    if entry and time.time() - entry[0] < CHAT_CACHE_TTL:
+        return entry[1]
+    return None
+
+def store_chat_reply(key, reply):
+    """Cache a finished reply, evicting the oldest entry once the store is full"""
+    cache = get_chat_reply_cache()
+    cache.pop(key, None)
+    if len(cache) >= CHAT_CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = (time.time(), reply)
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_model(api_key, model_name):
+    """Configured Gemini chat model, built once per key and model and shared across sessions"""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(
+        model_name=model_name,
+        system_instruction=CHAT_SYSTEM_INSTRUCTION
+    )
+
+def stream_chat_reply(provider, model_name, prompt, api_key):
+    """Yield the chat completion text as it streams in; failures raise"""
+    if provider == "OpenRouter":
+        # Static headers live on the shared session; only the key is per call
+        headers = {"Authorization": f"Bearer {api_key}"}
+        payload = {
+            "model": model_name,
+            "messages": [
+                {"role": "system", "content": CHAT_SYSTEM_INSTRUCTION},
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True
+        }
+        body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode("utf-8")
+        with get_http_session().post(
+            "https://openrouter.ai/api/v1/chat/completions",
+            headers=headers, data=body, timeout=(5, 60), stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"OpenRouter Error: {response.text}")
+            # SSE is always UTF-8; without a charset header requests would decode as ISO-8859-1
+            response.encoding = "utf-8"
+            # Server-sent events: "data: {json}" lines, ": ..." keep-alive comments
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                choices = (orjson or json).loads(data).get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        return
+    
+    model = get_gemini_model(api_key, model_name)
+    for chunk in model.generate_content(prompt, stream=True):
+        yield chunk.text
+
+def chat_reply(provider, model_name, prompt, api_key):
+    """Return (reply, streamed): the cached reply, or a fresh one streamed onto the page"""
+    key = (provider, model_name, CHAT_SYSTEM_HASH, prompt)
+    reply = get_cached_chat_reply(key)
+    if reply is not None:
+        return reply, False
+    reply = st.write_stream(stream_chat_reply(provider, model_name, prompt, api_key))
+    store_chat_reply(key, reply)
+    return reply, True
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_figure(builder, *args):
+    """Build a utils.visualizations figure once per distinct set of inputs"""
+    from utils import visualizations
+    return getattr(visualizations, builder)(*args)
+
+# Battery settings the Home page stores for the Analyses page, with fallbacks
+BATTERY_STATE_DEFAULTS = {
+    'battery_type': 'None', 'backup_hours': 8, 'battery_num': 0, 'battery_ah': 0,
+    'battery_cost': 0, 'battery_voltage': 12, 'battery_config': '1S'
+}
+
+def session_values(defaults, source=None):
+    """Read several session_state keys in one pass, falling back to the given defaults"""
+    ss = st.session_state if source is None else source
+    return {k: ss.get(k, v) for k, v in defaults.items()}
+
+@dataclass(frozen=True)
+class BatteryDetails:
+    num: int
+    ah: float
+    voltage: int
+    config: str
+
+@dataclass(frozen=True)
+class ExistingConfig:
+    """Calculator-sized system passed to the AI report so it reviews it rather than inventing one"""
+    system_kw: float
+    panel_count: int
+    panel_wattage: int
+    inverter_kw: float
+    solar_cost: float
+    battery_cost: float
+    upfront_cost: float
+    battery_type: str
+    battery_details: Optional[BatteryDetails]
+
+    @classmethod
+    def from_estimate(cls, estimate, battery):
+        breakdown = estimate.get('cost_breakdown', {})
+        panels = breakdown.get('panels', {})
+        return cls(
+            system_kw=breakdown.get('actual_system_kw', estimate['system_kw']),
+            panel_count=panels.get('count', 0),
+            panel_wattage=panels.get('wattage', 450),
+            inverter_kw=breakdown.get('inverter', {}).get('capacity_kw', 0),
+            solar_cost=estimate['solar_cost'],
+            battery_cost=estimate.get('battery_cost', 0),
+            upfront_cost=estimate['upfront_cost'],
+            battery_type=battery['battery_type'],
+            battery_details=BatteryDetails(
+                num=battery['battery_num'],
+                ah=battery['battery_ah'],
+                voltage=battery['battery_voltage'],
+                config=battery['battery_config']
+            ) if battery['battery_type'] != 'None' else None
+        )
+
+@st.cache_data(show_spinner=False)
+def cached_battery_estimate(backup_energy_kwh, battery_type, system_kw):
+    """Battery bank specs and cost; scalar inputs so reruns with the same widget values hit the cache"""
+    specs = calculate_battery_specs(backup_energy_kwh, battery_type, system_kw=system_kw)
+    return specs, calculate_battery_cost(specs, battery_type)
+
+# Appliance specs as aligned arrays: (watts, hours/day) per appliance
+_APPLIANCE_SPECS = {
+    "Fridge": (150, 24), "Freezer": (150, 24), "TV": (80, 4),
+    "LED Lights": (10, 5), "Laptop": (60, 6), "Router": (10, 24),
+    "Phone Chargers": (30, 3), "Water Pump": (500, 2),
+    "Air Conditioner": (1500, 8), "Iron": (1000, 0.3),
+    "Washing Machine": (500, 0.4), "Microwave": (800, 0.5),
+    "Electric Stove": (2000, 1), "Water Heater": (1500, 0.5)
+}
+_APPLIANCE_NAMES = tuple(_APPLIANCE_SPECS)
+_APPLIANCE_POWERS = np.array([spec[0] for spec in _APPLIANCE_SPECS.values()], dtype=np.float64)
+_APPLIANCE_HOURS = np.array([spec[1] for spec in _APPLIANCE_SPECS.values()], dtype=np.float64)
+_WATER_PUMP_IDX = _APPLIANCE_NAMES.index("Water Pump")
 
 def calculate_appliance_load(appliances, water_pump_hours=2):
     """Streamlined appliance load calculation"""
-    SPECS = {
-        "Fridge": (150, 24), "Freezer": (150, 24), "TV": (80, 4),
-        "LED Lights": (10, 5), "Laptop": (60, 6), "Router": (10, 24),
-        "Phone Chargers": (30, 3), "Water Pump": (500, water_pump_hours),
-        "Air Conditioner": (1500, 8), "Iron": (1000, 0.3),
-        "Washing Machine": (500, 0.4), "Microwave": (800, 0.5),
-        "Electric Stove": (2000, 1), "Water Heater": (1500, 0.5)
-    }
-    
-    daily_kwh = sum(
-        (power * hours * count) / 1000
-        for app, count in appliances.items()
-        if (spec := SPECS.get(app)) and count > 0
-        for power, hours in [spec]
+    counts = np.fromiter(
+        (appliances.get(name, 0) for name in _APPLIANCE_NAMES),
+        dtype=np.float64, count=len(_APPLIANCE_NAMES)
     )
-    
+    np.maximum(counts, 0, out=counts)
+
+    hours = _APPLIANCE_HOURS.copy()
+    hours[_WATER_PUMP_IDX] = water_pump_hours
+
+    daily_kwh = float(counts @ (_APPLIANCE_POWERS * hours)) / 1000
+
     return daily_kwh * 30.44
 
+# Per-kW yield model: panel efficiency * performance ratio * panel area (m2/kW)
+_PANEL_EFF, _PR, _AREA_PER_KW, _DAYS = 0.15, 0.80, 6.5, 365
+_ANNUAL_YIELD_PER_KW_PER_GHI = _PANEL_EFF * _PR * _AREA_PER_KW * _DAYS
+
+# Kenya grid emission factor (tCO2/MWh)
+GRID_EMISSION_FACTOR = 0.4087
+
+# Per kWh of yearly generation: tonnes CO2/year, trees/year, km driven/year, tonnes CO2 over 25 years
+_ENV_FACTORS = GRID_EMISSION_FACTOR / 1000 * np.array([1.0, 50.0, 5000.0, 25.0])
+
+def environmental_impact(annual_generation_kwh):
+    """(annual CO2 tonnes, trees equivalent, km saved, 25-year CO2 tonnes) for a yearly generation"""
+    return tuple((_ENV_FACTORS * annual_generation_kwh).tolist())
+
+# Present value of 25 years of equal annual savings at an 8% discount rate
+_DISCOUNT_RATE = 0.08
+_ANNUITY_25 = (1 - (1 + _DISCOUNT_RATE) ** -25) / _DISCOUNT_RATE
+
+@st.cache_data(max_entries=256, show_spinner=False)
 def calculate_quick_roi(monthly_kwh, ghi, rate, battery_cost=0):
-    """Fast ROI calculation without AI - now includes battery costs"""
+    """Fast ROI calculation without AI - now includes battery costs
+    
+    Cached on the scalar inputs; the catalog and assumptions it reads are
+    static for the life of the process.
+    """
     annual_kwh = monthly_kwh * 12
-    daily_yield_per_kw = ghi * 0.15 * 0.80 * 6.5  # efficiency * PR * area
-    annual_yield_per_kw = daily_yield_per_kw * 365
+    annual_yield_per_kw = ghi * _ANNUAL_YIELD_PER_KW_PER_GHI
     
     system_kw = max(0.5, annual_kwh / annual_yield_per_kw if annual_yield_per_kw > 0 else 1)
     solar_cost, cost_per_watt, cost_breakdown = calculate_system_cost(system_kw, EQUIPMENT_CATALOG, ASSUMPTIONS)
@@ -272,9 +426,9 @@ def calculate_quick_roi(monthly_kwh, ghi, rate, battery_cost=0):
     annual_savings = min(annual_generation, annual_kwh) * rate
     payback = upfront_cost / annual_savings if annual_savings > 0 else float('inf')
     
-    # NPV calculation
-    discount_rate = 0.08
-    npv = -upfront_cost + sum(annual_savings / ((1 + discount_rate) ** t) for t in range(1, 26))
+    # NPV calculation (closed-form annuity instead of summing 25 terms)
+    npv = -upfront_cost + annual_savings * _ANNUITY_25
+    roi_percent = (npv + upfront_cost) / upfront_cost * 100 if upfront_cost else 0.0
     
     return {
         'system_kw': system_kw,
@@ -285,8 +439,10 @@ def calculate_quick_roi(monthly_kwh, ghi, rate, battery_cost=0):
         'cost_breakdown': cost_breakdown,
         'annual_generation': annual_generation,
         'annual_savings': annual_savings,
+        'monthly_savings': annual_savings / 12,
         'payback_years': payback,
-        'npv_25yr': npv
+        'npv_25yr': npv,
+        'roi_percent': roi_percent
     }
 
 # ============================================================================
@@ -296,24 +452,82 @@ def calculate_quick_roi(monthly_kwh, ghi, rate, battery_cost=0):
 if 'step' not in st.session_state:
     st.session_state.step = 1
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_LIMIT)
 if 'page' not in st.session_state:
     st.session_state.page = "Home"
 if 'saved_analyses' not in st.session_state:
     st.session_state.saved_analyses = []
 
+# ============================================================================
+# STATIC HTML (st.html skips the Markdown pipeline that st.markdown goes through)
+# ============================================================================
+
+SIDEBAR_BRAND_HTML = (
+    "<h2 style='text-align: center; margin-top: -10px;'>Jua Smart</h2>"
+    "<p style='text-align: center; font-size: 0.9em; color: #666; margin-top: -10px;'>Solar Energy Advisor</p>"
+)
+
+SIDEBAR_FOOTER_HTML = """
+<div style='text-align: center; font-size: 0.8em; color: #888;'>
+    <p>Version 2.1</p>
+    <p>🌍 Made for Kenya</p>
+</div>
+"""
+
+TAGLINE_HTML = "<p class='tagline'>Your Intelligent Solar Energy Advisor for Kenya</p>"
+
+STEP_INDICATOR_HTML = """
+<div class='step-indicator'>
+    <div class='step %s'>1️⃣ Input Details</div>
+    <div class='step %s'>2️⃣ Quick Analysis</div>
+    <div class='step %s'>3️⃣ AI Recommendation</div>
+</div>
+"""
+
+def _render_step(step):
+    """Step indicator markup with each wizard step marked active/completed"""
+    return STEP_INDICATOR_HTML % tuple(
+        "active" if step == n else "completed" if step > n and n < 3 else ""
+        for n in (1, 2, 3)
+    )
+
+# Only three wizard states, so render them all once
+STEP_HTML = {step: _render_step(step) for step in (1, 2, 3)}
+
+# Chat page example questions, shown while the conversation is empty
+SUGGESTIONS_LEFT = """
+**Cost & Sizing:**
+- How much does a 5kW solar system cost in Kenya?
+- What size solar system do I need for 300 kWh per month?
+- Is solar worth it with current KPLC rates?
+
+**Installation:**
+- How do I get started with solar installation?
+- What are the best solar panel brands in Kenya?
+- Do I need a permit to install solar panels?
+"""
+
+SUGGESTIONS_RIGHT = """
+**Regulations:**
+- How does net metering work in Kenya?
+- What are EPRA's requirements for solar?
+- Are there tax exemptions for solar equipment?
+
+**Maintenance:**
+- How often should I clean my solar panels?
+- What's the lifespan of solar panels in Kenya?
+- Do panels work during rainy season?
+"""
+
 # ============================================================================
 # SIDEBAR NAVIGATION
 # ============================================================================
 
 with st.sidebar:
-    # Brand icon at top - centered
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.image("assets/icons/jua_smart_icon.png", use_container_width=True)
-    st.markdown("<h2 style='text-align: center; margin-top: -10px;'>Jua Smart</h2>", unsafe_allow_html=True)
-    st.markdown("<p style='text-align: center; font-size: 0.9em; color: #666; margin-top: -10px;'>Solar Energy Advisor</p>", unsafe_allow_html=True)
-    st.markdown("---")
+    # Brand icon at top - centered by the stImage rule in styles.css
+    st.image(load_image("assets/icons/jua_smart_icon.png", max_width=300), width=150)
+    st.html(SIDEBAR_BRAND_HTML)
+    st.divider()
     
     # Navigation Menu
     st.markdown("### 🧭 Navigation")
@@ -337,7 +551,7 @@ with st.sidebar:
     
     st.session_state.page = page_options[selected_page]
     
-    st.markdown("---")
+    st.divider()
     
     # Quick Stats (if analysis exists)
     if 'monthly_consumption' in st.session_state:
@@ -350,7 +564,7 @@ with st.sidebar:
             sys_sizing = rec.get('system_sizing', {})
             st.metric("System Size", f"{sys_sizing.get('required_system_size_kw', 0):.1f} kW")
         
-        st.markdown("---")
+        st.divider()
     
     # Settings section removed - AI Model Settings below is sufficient
     
@@ -372,56 +586,92 @@ with st.sidebar:
             st.warning("⚠️ Add GEMINI_API_KEY to .env file")
             st.info("Get your free API key at: https://aistudio.google.com/app/apikey")
     
-    st.markdown("---")
+    st.divider()
     
     # Footer
-    st.markdown("""
-    <div style='text-align: center; font-size: 0.8em; color: #888;'>
-        <p>Version 2.1</p>
-        <p>🌍 Made for Kenya</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(SIDEBAR_FOOTER_HTML)
 
 # ============================================================================
 # HEADER
 # ============================================================================
 
 # Display custom logo - centered with reasonable size
-col_logo1, col_logo2, col_logo3 = st.columns([1, 3, 1])
-with col_logo2:
-    st.image("assets/logos/jua_smart_logo.png", width=400)
+st.image(load_image("assets/logos/jua_smart_logo.png"), width=400)
 
-st.markdown("<p class='tagline'>Your Intelligent Solar Energy Advisor for Kenya</p>", unsafe_allow_html=True)
+st.html(TAGLINE_HTML)
 
 
 
 # ============================================================================
-# MAIN CONTENT - PAGE ROUTER
+# DATA - WAIT FOR BACKGROUND LOAD (sidebar and header are already drawn)
 # ============================================================================
 
-# Get current page from session state
-current_page = st.session_state.get('page', 'Home')
+# Load data
+if data_future.done():
+    # Later reruns read load_all_data's cache directly, so its ttl still applies
+    data, load_errors = load_all_data()
+else:
+    with st.spinner("⚡ Loading Jua Smart..."):
+        data, load_errors = data_future.result()
+
+if load_errors:
+    st.error("⚠️ Some data files could not be loaded:")
+    for error in load_errors:
+        st.error(f"  • {error}")
+    st.stop()
+
+# Extract data
+GHI_DATA = data.get("ghi", {})
+TARIFF_DATA = data.get("tariff", {})
+EQUIPMENT_CATALOG = data.get("equipment", {})
+ASSUMPTIONS = data.get("assumptions", {})
+INCENTIVES = data.get("incentives", {})
+
+# County -> GHI lookup, built once so each query is a single dict get
+if isinstance(GHI_DATA, Mapping) and "counties" in GHI_DATA:
+    _GHI_BY_COUNTY = {
+        c.get("county"): c.get("avg_irradiance_kwh_m2_day", 5.2)
+        for c in GHI_DATA["counties"]
+    }
+elif isinstance(GHI_DATA, Mapping):
+    _GHI_BY_COUNTY = {
+        k: v.get("ghi_kwh_m2_day", 5.2)
+        for k, v in GHI_DATA.items() if isinstance(v, Mapping)
+    }
+else:
+    _GHI_BY_COUNTY = {}
+
+GHI_COUNTY_NAMES = ghi_county_names(GHI_DATA)
+
+# ============================================================================
+# MAIN CONTENT - PAGES (dispatched by the router below)
+# ============================================================================
 
 # ============================================================================
 # PAGE: HOME DASHBOARD
 # ============================================================================
 
-if current_page == "Home":
+CUSTOM_APPLIANCE_DEFAULTS = {'name': '', 'power': 100, 'hours': 1.0}
+
+def custom_appliance_editor_key():
+    return f"custom_appliance_editor_{st.session_state.custom_editor_version}"
+
+def save_custom_appliance_edits():
+    """Apply the table's edits/deletions/additions to custom_appliances as soon as they happen"""
+    changes = st.session_state[custom_appliance_editor_key()]
+    rows = [dict(row) for row in st.session_state.custom_appliances]
+    for i, edits in changes["edited_rows"].items():
+        rows[int(i)].update(edits)
+    deleted = set(changes["deleted_rows"])
+    rows = [row for i, row in enumerate(rows) if i not in deleted]
+    rows += [{**CUSTOM_APPLIANCE_DEFAULTS, **added} for added in changes["added_rows"]]
+    st.session_state.custom_appliances = rows
+    # Fresh editor so its stored deltas aren't replayed against the updated list
+    st.session_state.custom_editor_version += 1
+
+def render_home():
     # Progress Indicator
-    progress_html = f"""
-    <div class='step-indicator'>
-        <div class='step {"active" if st.session_state.step == 1 else "completed" if st.session_state.step > 1 else ""}'>
-            1️⃣ Input Details
-        </div>
-        <div class='step {"active" if st.session_state.step == 2 else "completed" if st.session_state.step > 2 else ""}'>
-            2️⃣ Quick Analysis
-        </div>
-        <div class='step {"active" if st.session_state.step == 3 else ""}'>
-            3️⃣ AI Recommendation
-        </div>
-    </div>
-    """
-    st.markdown(progress_html, unsafe_allow_html=True)
+    st.html(STEP_HTML[st.session_state.step])
     
     st.header("Tell Us About Your Energy Needs")
     
@@ -437,18 +687,12 @@ if current_page == "Home":
         
         if "County" in location_method:
             # County selection (static data)
-            county_options = sorted([
-                k for k in GHI_DATA.keys() 
-                if k not in ["All_Counties", "counties"]
-            ]) if isinstance(GHI_DATA, dict) and "counties" not in GHI_DATA else sorted([
-                c.get("county", f"County_{i}") 
-                for i, c in enumerate(GHI_DATA.get("counties", []))
-            ])
+            county_options, default_county_index = get_county_options(GHI_COUNTY_NAMES)
             
             selected_county = st.selectbox(
                 "📍 Your County",
                 county_options,
-                index=county_options.index("Nairobi") if "Nairobi" in county_options else 0
+                index=default_county_index
             )
             
             ghi_value = get_ghi_for_location(selected_county)
@@ -466,21 +710,20 @@ if current_page == "Home":
             
             if address_input and st.button("🔍 Fetch Solar Data", type="primary"):
                 try:
-                    from utils.nasa_power_api import address_to_coordinates, fetch_nasa_power_data
-                    from datetime import datetime, timedelta
-                    
                     with st.spinner(f"Fetching real-time solar data for {address_input}..."):
                         # Get coordinates
-                        lat, lon = address_to_coordinates(address_input + ", Kenya")
+                        lat, lon = cached_geocode(address_input + ", Kenya")
                         
-                        # Fetch last year's data for average
-                        end_date = datetime.now() - timedelta(days=30)
+                        # Fetch last year's data for average (whole days, so repeat
+                        # queries on the same day hit the cache)
+                        end_date = datetime.now().date() - timedelta(days=30)
                         start_date = end_date - timedelta(days=365)
                         
-                        # Fetch solar irradiance data
-                        df = fetch_nasa_power_data(
-                            lat, lon, start_date, end_date,
-                            parameters=['ALLSKY_SFC_SW_DWN']  # All Sky Surface Shortwave Downward Irradiance
+                        # Fetch solar irradiance data; NASA POWER is coarsely gridded,
+                        # so rounding the point only improves the cache hit rate
+                        df = cached_nasa_power_data(
+                            round(lat, 3), round(lon, 3), start_date, end_date,
+                            parameters=('ALLSKY_SFC_SW_DWN',)  # All Sky Surface Shortwave Downward Irradiance
                         )
                         
                         # Calculate average GHI in kWh/m²/day
@@ -525,9 +768,10 @@ if current_page == "Home":
             horizontal=True
         )
     
-    st.markdown("---")
+    st.divider()
     
     monthly_consumption = 0
+    analyze_from_form = None  # Set by the appliance form's own Analyze button
     
     if input_method == "💡 Monthly Bill (Easiest)":
         st.write("**Choose your input method:**")
@@ -581,35 +825,47 @@ if current_page == "Home":
         # Simplified Appliance Selector
         st.write("Select your appliances:")
         
-        col1, col2, col3 = st.columns(3)
-        appliances = {}
-        
-        with col1:
-            st.subheader("🍳 Kitchen")
-            appliances["Fridge"] = st.number_input("Refrigerators", 0, 5, 1)
-            appliances["Microwave"] = st.number_input("Microwaves", 0, 3, 0)
-            appliances["Electric Stove"] = st.number_input("Electric Stoves", 0, 2, 0)
-        
-        with col2:
-            st.subheader("💡 Living")
-            appliances["TV"] = st.number_input("TVs", 0, 5, 1)
-            appliances["LED Lights"] = st.number_input("LED Bulbs (sets of 6)", 0, 20, 6)
-            appliances["Laptop"] = st.number_input("Laptops/Computers", 0, 5, 1)
-        
-        with col3:
-            st.subheader("🔧 Other")
-            appliances["Water Pump"] = st.number_input("Water Pump", 0, 2, 0)
-            appliances["Air Conditioner"] = st.number_input("Air Conditioners", 0, 5, 0)
-            appliances["Washing Machine"] = st.number_input("Washing Machines", 0, 2, 0)
+        # One form so count changes batch into a single rerun on submit
+        with st.form("appliance_form", border=False):
+            col1, col2, col3 = st.columns(3)
+            appliances = {}
+            
+            with col1:
+                st.subheader("🍳 Kitchen")
+                appliances["Fridge"] = st.number_input("Refrigerators", 0, 5, 1)
+                appliances["Microwave"] = st.number_input("Microwaves", 0, 3, 0)
+                appliances["Electric Stove"] = st.number_input("Electric Stoves", 0, 2, 0)
+            
+            with col2:
+                st.subheader("💡 Living")
+                appliances["TV"] = st.number_input("TVs", 0, 5, 1)
+                appliances["LED Lights"] = st.number_input("LED Bulbs (sets of 6)", 0, 20, 6)
+                appliances["Laptop"] = st.number_input("Laptops/Computers", 0, 5, 1)
+            
+            with col3:
+                st.subheader("🔧 Other")
+                appliances["Water Pump"] = st.number_input("Water Pump", 0, 2, 0)
+                appliances["Air Conditioner"] = st.number_input("Air Conditioners", 0, 5, 0)
+                appliances["Washing Machine"] = st.number_input("Washing Machines", 0, 2, 0)
+            
+            col_update, col_analyze = st.columns(2)
+            with col_update:
+                st.form_submit_button("🔄 Update Appliance Load", use_container_width=True)
+            with col_analyze:
+                # Analyzing from inside the form submits the latest counts with it
+                analyze_from_form = st.form_submit_button(
+                    "🔍 Analyze My Solar Potential", type="primary", use_container_width=True
+                )
         
         # Custom Appliances Section
-        st.markdown("---")
+        st.divider()
         st.subheader("➕ Custom Appliances")
         st.write("Add your own appliances not listed above")
         
         # Initialize custom appliances in session state
         if 'custom_appliances' not in st.session_state:
             st.session_state.custom_appliances = []
+            st.session_state.custom_editor_version = 0
         
         # Add new custom appliance
         col_custom1, col_custom2, col_custom3, col_custom4 = st.columns([2, 1, 1, 1])
@@ -622,41 +878,45 @@ if current_page == "Home":
         with col_custom4:
             if st.button("Add", type="primary"):
                 if custom_name and custom_name.strip():
-                    st.session_state.custom_appliances.append({
+                    st.session_state.custom_appliances = st.session_state.custom_appliances + [{
                         'name': custom_name.strip(),
                         'power': custom_power,
                         'hours': custom_hours
-                    })
+                    }]
+                    st.session_state.custom_editor_version += 1
                     st.success(f"Added {custom_name}!")
-                    st.rerun()
         
-        # Display and manage custom appliances
-        if st.session_state.custom_appliances:
+        # Display and manage custom appliances in one editable table (rows can be
+        # edited or deleted in place; changes are saved to session state immediately,
+        # so they survive leaving the page)
+        custom_appliances = st.session_state.custom_appliances
+        if custom_appliances:
             st.write("**Your Custom Appliances:**")
-            for idx, custom in enumerate(st.session_state.custom_appliances):
-                col_show1, col_show2, col_show3, col_show4 = st.columns([2, 1, 1, 1])
-                with col_show1:
-                    st.write(f"**{custom['name']}**")
-                with col_show2:
-                    st.write(f"{custom['power']}W")
-                with col_show3:
-                    st.write(f"{custom['hours']}h/day")
-                with col_show4:
-                    if st.button(f"Remove", key=f"remove_{idx}"):
-                        st.session_state.custom_appliances.pop(idx)
-                        st.rerun()
+            st.data_editor(
+                custom_appliances,
+                num_rows="dynamic",
+                key=custom_appliance_editor_key(),
+                on_change=save_custom_appliance_edits,
+                column_config={
+                    "name": st.column_config.TextColumn("Appliance"),
+                    "power": st.column_config.NumberColumn("Power (W)", min_value=1, max_value=5000, default=100),
+                    "hours": st.column_config.NumberColumn("Hours/Day", min_value=0.1, max_value=24.0, step=0.1, default=1.0)
+                },
+                use_container_width=True
+            )
         
         # Calculate total consumption including custom appliances
         base_consumption = calculate_appliance_load(appliances)
         
         # Add custom appliances consumption
         custom_consumption = 0
-        if st.session_state.custom_appliances:
-            for custom in st.session_state.custom_appliances:
-                # Daily kWh = (power_watts * hours) / 1000
-                daily_kwh = (custom['power'] * custom['hours']) / 1000
-                # Monthly kWh = daily * 30.44
-                custom_consumption += daily_kwh * 30.44
+        if custom_appliances:
+            # Monthly kWh = sum(power_watts * hours) / 1000 * 30.44
+            specs = np.array(
+                [(c['power'] or 0, c['hours'] or 0) for c in custom_appliances],
+                dtype=np.float64
+            )
+            custom_consumption = float(specs[:, 0] @ specs[:, 1]) / 1000 * 30.44
         
         monthly_consumption = base_consumption + custom_consumption
         
@@ -665,7 +925,7 @@ if current_page == "Home":
         else:
             st.success(f"📊 Estimated Monthly Consumption: **{monthly_consumption:.0f} kWh**")
     
-    st.markdown("---")
+    st.divider()
     
     # System Preferences - Simplified
     col_pref1, col_pref2 = st.columns(2)
@@ -688,7 +948,7 @@ if current_page == "Home":
     
     # Battery Configuration (for Hybrid/Off-grid systems)
     if "Hybrid" in system_type or "Off-grid" in system_type:
-        st.markdown("---")
+        st.divider()
         st.subheader("🔋 Battery Backup Configuration")
         st.write("Configure your battery backup system")
         
@@ -715,14 +975,12 @@ if current_page == "Home":
         
         # Calculate battery requirements automatically
         if monthly_consumption > 0:
-            from utils.battery_calculator import calculate_battery_specs, calculate_battery_cost
-            
             daily_consumption_kwh = monthly_consumption / 30.44
             backup_energy_kwh = (daily_consumption_kwh / 24) * backup_hours
             
             # Estimate system size for voltage determination
             # This is a rough estimate - will be refined in analysis
-            estimated_system_kw = (monthly_consumption * 12) / (ghi_value * 0.15 * 0.80 * 6.5 * 365)
+            estimated_system_kw = (monthly_consumption * 12) / (ghi_value * _ANNUAL_YIELD_PER_KW_PER_GHI)
             estimated_system_kw = max(0.5, estimated_system_kw)
             
             # Map UI selection to battery type for calculations
@@ -735,59 +993,58 @@ if current_page == "Home":
             
             try:
                 # Pass system_kw to get proper voltage configuration
-                bat_specs = calculate_battery_specs(backup_energy_kwh, actual_bat_type, system_kw=estimated_system_kw)
-                bat_cost = calculate_battery_cost(bat_specs, actual_bat_type)
+                bat_specs, bat_cost = cached_battery_estimate(backup_energy_kwh, actual_bat_type, estimated_system_kw)
                 
                 # Display battery estimates
                 st.markdown("##### 📊 Battery Bank Estimate")
                 col_info1, col_info2, col_info3, col_info4 = st.columns(4)
                 
                 with col_info1:
-                    st.metric("Capacity Needed", f"{bat_specs['total_capacity_kwh']:.1f} kWh")
+                    st.metric("Capacity Needed", f"{bat_specs.total_capacity_kwh:.1f} kWh")
                 
                 with col_info2:
                     # Use the correct battery configuration from calculator
-                    total_batteries = bat_specs['total_batteries']
+                    total_batteries = bat_specs.total_batteries
                     
                     # Check if kWh-based or Ah-based
-                    if bat_specs.get('is_kwh_based', False):
+                    if bat_specs.is_kwh_based:
                         # kWh-based lithium (e.g., Menred 5.12kWh)
-                        kwh_per_battery = bat_specs.get('recommended_kwh', 0)
+                        kwh_per_battery = bat_specs.recommended_kwh
                         st.metric("Battery Units", f"{total_batteries} × {kwh_per_battery}kWh")
                     else:
                         # Ah-based (Lead-Acid, Gel, or small Lithium)
-                        ah_per_battery = bat_specs['recommended_ah']
-                        battery_voltage_unit = bat_specs.get('battery_voltage_unit', 12)
+                        ah_per_battery = bat_specs.recommended_ah
+                        battery_voltage_unit = bat_specs.battery_voltage_unit
                         st.metric("Battery Configuration", f"{total_batteries} × {ah_per_battery}Ah @{battery_voltage_unit}V")
                 
                 with col_info3:
-                    system_voltage = bat_specs['system_voltage']
-                    configuration = bat_specs['configuration']
+                    system_voltage = bat_specs.system_voltage
+                    configuration = bat_specs.configuration
                     st.metric("System Voltage", f"{system_voltage}V ({configuration})")
                 
                 with col_info4:
-                    st.metric("Battery Cost", f"KSh {bat_cost['initial_cost_ksh']:,.0f}")
+                    st.metric("Battery Cost", f"KSh {bat_cost.initial_cost_ksh:,.0f}")
                 
                 # Show configuration explanation
-                if bat_specs.get('is_kwh_based', False):
-                    kwh_per_unit = bat_specs.get('recommended_kwh', 0)
+                if bat_specs.is_kwh_based:
+                    kwh_per_unit = bat_specs.recommended_kwh
                     st.info(f"ℹ️ **{system_voltage}V Lithium System**: {total_batteries} × {kwh_per_unit}kWh units" +
-                           (f" ({bat_specs['batteries_in_series']} in series × {bat_specs['parallel_strings']} parallel)" 
-                            if bat_specs['parallel_strings'] > 1 else ""))
-                elif bat_specs['batteries_in_series'] > 1:
-                    ah_per_battery = bat_specs['recommended_ah']
-                    st.info(f"ℹ️ **{system_voltage}V System**: {bat_specs['batteries_in_series']} × {ah_per_battery}Ah batteries in series" + 
-                           (f" × {bat_specs['parallel_strings']} parallel strings" if bat_specs['parallel_strings'] > 1 else "") +
+                           (f" ({bat_specs.batteries_in_series} in series × {bat_specs.parallel_strings} parallel)" 
+                            if bat_specs.parallel_strings > 1 else ""))
+                elif bat_specs.batteries_in_series > 1:
+                    ah_per_battery = bat_specs.recommended_ah
+                    st.info(f"ℹ️ **{system_voltage}V System**: {bat_specs.batteries_in_series} × {ah_per_battery}Ah batteries in series" + 
+                           (f" × {bat_specs.parallel_strings} parallel strings" if bat_specs.parallel_strings > 1 else "") +
                            f" = {total_batteries} total batteries")
                 
                 # Store for later use
-                battery_cost_total = bat_cost['initial_cost_ksh']
+                battery_cost_total = bat_cost.initial_cost_ksh
                 battery_num = total_batteries
-                battery_ah = bat_specs['recommended_ah']
+                battery_ah = bat_specs.recommended_ah
                 battery_voltage = system_voltage
                 battery_config = configuration
-                battery_is_kwh = bat_specs.get('is_kwh_based', False)
-                battery_kwh_unit = bat_specs.get('recommended_kwh', 0) if battery_is_kwh else 0
+                battery_is_kwh = bat_specs.is_kwh_based
+                battery_kwh_unit = bat_specs.recommended_kwh if battery_is_kwh else 0
                 
             except Exception as e:
                 st.warning(f"Could not calculate battery requirements: {str(e)}")
@@ -812,11 +1069,18 @@ if current_page == "Home":
         battery_ah = 0
         actual_bat_type = "None"
     
-    st.markdown("---")
+    st.divider()
     
     # Generate Button
     if monthly_consumption >= 10:
-        if st.button("� Analyze My Solar Potential", type="primary", use_container_width=True):
+        if analyze_from_form is None:
+            analyze_clicked = st.button("� Analyze My Solar Potential", type="primary", use_container_width=True)
+        else:
+            # A button out here would analyze counts still unsubmitted in the form
+            analyze_clicked = analyze_from_form
+            if not analyze_clicked:
+                st.info("👆 Click **🔍 Analyze My Solar Potential** in the appliance form above to analyze your latest appliance counts.")
+        if analyze_clicked:
             # Save to session state
             st.session_state.update({
                 'monthly_consumption': monthly_consumption,
@@ -853,11 +1117,13 @@ if current_page == "Home":
 # PAGE: QUICK CALCULATOR
 # ============================================================================
 
-elif current_page == "Calculator":
+# Fragment: Calculator inputs only rerun this page, not the sidebar or router
+@st.fragment
+def render_calculator():
     st.header("🧮 Quick Solar Calculator")
     st.write("Get instant estimates without detailed input")
     
-    st.markdown("---")
+    st.divider()
     
     col1, col2 = st.columns(2)
     
@@ -873,18 +1139,12 @@ elif current_page == "Calculator":
         )
         
         # County selection with proper data
-        county_options = sorted([
-            k for k in GHI_DATA.keys() 
-            if k not in ["All_Counties", "counties"]
-        ]) if isinstance(GHI_DATA, dict) and "counties" not in GHI_DATA else sorted([
-            c.get("county", f"County_{i}") 
-            for i, c in enumerate(GHI_DATA.get("counties", []))
-        ])
+        county_options, default_county_index = get_county_options(GHI_COUNTY_NAMES)
         
         quick_county = st.selectbox(
             "📍 Select County",
             county_options,
-            index=county_options.index("Nairobi") if "Nairobi" in county_options else 0,
+            index=default_county_index,
             help="Choose your county for solar potential calculation"
         )
         
@@ -906,7 +1166,7 @@ elif current_page == "Calculator":
         current_bill = quick_kwh * quick_rate
         st.metric("📄 Current Monthly Bill", f"KSh {current_bill:,.0f}")
     
-    st.markdown("---")
+    st.divider()
     
     if st.button("⚡ Calculate Solar Potential", type="primary", use_container_width=True):
         estimate = calculate_quick_roi(quick_kwh, ghi, quick_rate)
@@ -932,13 +1192,12 @@ elif current_page == "Calculator":
                 f"{estimate['payback_years']:.1f} years"
             )
         with col_r4:
-            monthly_savings = estimate['annual_savings'] / 12
             st.metric(
                 "💰 Monthly Savings",
-                f"KSh {monthly_savings:,.0f}"
+                f"KSh {estimate['monthly_savings']:,.0f}"
             )
         
-        st.markdown("---")
+        st.divider()
         
         # Additional insights
         col_i1, col_i2 = st.columns(2)
@@ -947,15 +1206,14 @@ elif current_page == "Calculator":
             st.markdown("### 📊 Financial Summary")
             st.write(f"**Annual Savings:** KSh {estimate['annual_savings']:,.0f}")
             st.write(f"**25-Year Profit:** KSh {estimate['npv_25yr']:,.0f}")
-            roi_percent = ((estimate['npv_25yr'] + estimate['upfront_cost']) / estimate['upfront_cost']) * 100
-            st.write(f"**Total ROI:** {roi_percent:.0f}%")
+            st.write(f"**Total ROI:** {estimate['roi_percent']:.0f}%")
         
         with col_i2:
             st.markdown("### 🌱 Environmental Impact")
-            annual_co2 = estimate['annual_generation'] * 0.4087 / 1000  # tonnes
+            annual_co2, trees, _, total_co2 = environmental_impact(estimate['annual_generation'])
             st.write(f"**CO₂ Offset/Year:** {annual_co2:.1f} tonnes")
-            st.write(f"**Trees Equivalent:** {int(annual_co2 * 50):,} trees/year")
-            st.write(f"**25-Year CO₂ Offset:** {annual_co2 * 25:.1f} tonnes")
+            st.write(f"**Trees Equivalent:** {trees:,.0f} trees/year")
+            st.write(f"**25-Year CO₂ Offset:** {total_co2:.1f} tonnes")
         
         st.success("💡 **Tip:** For detailed analysis with AI recommendations, use the **Home Dashboard**")
 
@@ -964,29 +1222,32 @@ elif current_page == "Calculator":
 # PAGE: MY ANALYSES
 # ============================================================================
 
-elif current_page == "Analyses":
+def render_analyses():
     st.header("Your Solar Analysis")
+    # Plain-dict snapshot: reads below skip the session_state proxy
+    ss = dict(st.session_state)
     
-    if 'monthly_consumption' not in st.session_state:
+    if 'monthly_consumption' not in ss:
         st.info("👈 Please complete the **Home Dashboard** first to see your analysis.")
     else:
-        # Quick Summary Cards
-        col1, col2, col3, col4 = st.columns(4)
-        monthly_consumption = st.session_state['monthly_consumption']
-        ghi_value = st.session_state['ghi_value']
-        effective_rate = st.session_state['effective_rate']
+        monthly_consumption = ss['monthly_consumption']
+        ghi_value = ss['ghi_value']
+        effective_rate = ss['effective_rate']
         
         # Get battery info from session state
-        battery_cost_total = st.session_state.get('battery_cost', 0)
+        battery_cost_total = ss.get('battery_cost', 0)
         
         # Calculate quick estimate with battery cost
         estimate = calculate_quick_roi(monthly_consumption, ghi_value, effective_rate, battery_cost_total)
+        battery = session_values(BATTERY_STATE_DEFAULTS, ss)
+        # Existing configuration for the AI report, so it stays consistent with this estimate
+        existing_config = ExistingConfig.from_estimate(estimate, battery)
         
         # ========================================================================
         # SYSTEM SPECIFICATION SECTION - BEFORE FINANCIAL ANALYSIS
         # ========================================================================
         
-        st.markdown("---")
+        st.divider()
         st.header("📦 Your Complete System Specification")
         st.write("Here's what your solar + battery system will include")
         
@@ -1041,41 +1302,33 @@ elif current_page == "Analyses":
                 st.write(f"- Total capacity: {actual_system_kw:.1f} kW")
         
         with col_spec2:
-            battery_type = st.session_state.get('battery_type', 'None')
+            battery_type = battery['battery_type']
             
             if battery_type and battery_type != "None":
                 st.subheader("🔋 Battery Bank")
                 
-                battery_type_detail = st.session_state.get('battery_type_detail', battery_type)
-                backup_hours = st.session_state.get('backup_hours', 8)
-                battery_num = st.session_state.get('battery_num', 0)
-                battery_ah = st.session_state.get('battery_ah', 0)
-                battery_cost = st.session_state.get('battery_cost', 0)
-                battery_voltage = st.session_state.get('battery_voltage', 12)
-                battery_config = st.session_state.get('battery_config', '1S')
-                
                 st.metric("Battery Type", battery_type)
-                st.metric("Configuration", f"{battery_num} × {battery_ah}Ah @ 12V")
-                st.metric("System Voltage", f"{battery_voltage}V ({battery_config})")
-                st.metric("Backup Duration", f"{backup_hours} hours")
-                st.metric("Battery Cost", f"KSh {battery_cost:,.0f}")
+                st.metric("Configuration", f"{battery['battery_num']} × {battery['battery_ah']}Ah @ 12V")
+                st.metric("System Voltage", f"{battery['battery_voltage']}V ({battery['battery_config']})")
+                st.metric("Backup Duration", f"{battery['backup_hours']} hours")
+                st.metric("Battery Cost", f"KSh {battery['battery_cost']:,.0f}")
                 
                 # Calculate total capacity
-                total_kwh = (battery_num * battery_ah * 12) / 1000
+                total_kwh = (battery['battery_num'] * battery['battery_ah'] * 12) / 1000
                 
                 st.markdown("**Battery Specifications:**")
                 st.write(f"- Chemistry: {battery_type}")
-                st.write(f"- Individual battery: {battery_ah}Ah @ 12V")
-                st.write(f"- System voltage: {battery_voltage}V")
-                st.write(f"- Configuration: {battery_config}")
-                st.write(f"- Total batteries: {battery_num}")
+                st.write(f"- Individual battery: {battery['battery_ah']}Ah @ 12V")
+                st.write(f"- System voltage: {battery['battery_voltage']}V")
+                st.write(f"- Configuration: {battery['battery_config']}")
+                st.write(f"- Total batteries: {battery['battery_num']}")
                 st.write(f"- Total capacity: {total_kwh:.1f} kWh")
-                st.write(f"- Backup time: {backup_hours} hours")
+                st.write(f"- Backup time: {battery['backup_hours']} hours")
             else:
                 st.subheader("🔋 Battery Bank")
                 st.info("**Grid-tied system - No battery backup**\n\nThis system connects directly to the grid without battery storage.")
         
-        st.markdown("---")
+        st.divider()
         
         # ========================================================================
         # FINANCIAL ANALYSIS - NOW WITH COMPLETE COSTS
@@ -1102,7 +1355,7 @@ elif current_page == "Analyses":
             st.metric(
                 "💵 Annual Savings",
                 f"KSh {estimate['annual_savings']:,.0f}",
-                delta=f"{(estimate['annual_savings']/12):,.0f}/mo"
+                delta=f"{estimate['monthly_savings']:,.0f}/mo"
             )
         
         with col4:
@@ -1113,7 +1366,7 @@ elif current_page == "Analyses":
                 delta="ROI Point"
             )
         
-        st.markdown("---")
+        st.divider()
         
         # Visualization Tabs
         viz_tab1, viz_tab2, viz_tab3 = st.tabs(["� Financial", "🌍 Environmental", "📊 Breakdown"])
@@ -1121,7 +1374,8 @@ elif current_page == "Analyses":
         with viz_tab1:
             # Financial Timeline
             inverter_cost = estimate['upfront_cost'] * 0.20 * 0.5
-            fig_timeline = create_financial_timeline(
+            fig_timeline = cached_figure(
+                "create_financial_timeline",
                 estimate['upfront_cost'],
                 estimate['annual_savings'],
                 estimate['payback_years'] if estimate['payback_years'] != float('inf') else 0,
@@ -1135,25 +1389,22 @@ elif current_page == "Analyses":
             with col_i1:
                 st.metric("25-Year Profit", f"KSh {estimate['npv_25yr']:,.0f}")
             with col_i2:
-                roi_percent = ((estimate['npv_25yr'] + estimate['upfront_cost']) / estimate['upfront_cost']) * 100
-                st.metric("Total ROI", f"{roi_percent:.0f}%")
+                st.metric("Total ROI", f"{estimate['roi_percent']:.0f}%")
             with col_i3:
-                monthly_savings = estimate['annual_savings'] / 12
-                st.metric("Monthly Savings", f"KSh {monthly_savings:,.0f}")
+                st.metric("Monthly Savings", f"KSh {estimate['monthly_savings']:,.0f}")
         
         with viz_tab2:
             # Environmental Impact
-            annual_co2 = estimate['annual_generation'] * 0.4087 / 1000  # tCO2
-            total_co2 = annual_co2 * 25
+            annual_co2, trees, km_saved, total_co2 = environmental_impact(estimate['annual_generation'])
             
             col_e1, col_e2 = st.columns(2)
             with col_e1:
-                st.plotly_chart(create_co2_offset_gauge(annual_co2), use_container_width=True)
+                st.plotly_chart(cached_figure("create_co2_offset_gauge", annual_co2), use_container_width=True)
             
             with col_e2:
                 st.markdown("### 🌱 Environmental Benefits")
-                st.metric("Trees Equivalent", f"{int(annual_co2 * 50):,} trees/year")
-                st.metric("Car Miles Saved", f"{int(annual_co2 * 5000):,} km/year")
+                st.metric("Trees Equivalent", f"{trees:,.0f} trees/year")
+                st.metric("Car Miles Saved", f"{km_saved:,.0f} km/year")
                 st.metric("25-Year CO₂ Offset", f"{total_co2:.1f} tons")
         
         with viz_tab3:
@@ -1169,12 +1420,10 @@ elif current_page == "Analyses":
                 battery_cost = estimate.get('battery_cost', 0)
                 
                 # Create detailed pie chart
-                labels = ['Panels', 'Inverter', 'Batteries', 'VAT (16%)', 'Mounting', 'Safety', 'Installation & BOS']
-                values = [panel_cost, inverter_cost, battery_cost, vat_cost, mounting_cost, safety_cost, installation_bos]
+                labels = ('Panels', 'Inverter', 'Batteries', 'VAT (16%)', 'Mounting', 'Safety', 'Installation & BOS')
+                values = (panel_cost, inverter_cost, battery_cost, vat_cost, mounting_cost, safety_cost, installation_bos)
                 
-                import plotly.graph_objects as go
-                fig_pie = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.3)])
-                fig_pie.update_layout(margin=dict(t=0, b=0, l=0, r=0))
+                fig_pie = cached_figure("create_detailed_cost_pie", labels, values)
                 st.plotly_chart(fig_pie, use_container_width=True)
                 
             else:
@@ -1189,12 +1438,13 @@ elif current_page == "Analyses":
                     # If no battery cost but total is high, assume some split
                     battery_cost = estimate['upfront_cost'] * 0.15
             
-                fig_pie = create_cost_breakdown_pie(
+                fig_pie = cached_figure(
+                    "create_cost_breakdown_pie",
                     panel_cost, inverter_cost, battery_cost, installation, other
                 )
                 st.plotly_chart(fig_pie, use_container_width=True)
         
-        st.markdown("---")
+        st.divider()
         
         # AI Recommendation Option
         st.subheader("Want a Detailed AI Analysis?")
@@ -1212,39 +1462,21 @@ elif current_page == "Analyses":
         with col_ai2:
             if st.button("🤖 Generate AI Report", type="primary", use_container_width=True):
                 with st.spinner("🔄 Analyzing (30-60 seconds)..."):
-                    # Prepare existing configuration for AI context to ensure consistency
-                    # This forces the AI to "review" our calculated system rather than inventing a new one
-                    existing_config = {
-                        'system_kw': estimate.get('cost_breakdown', {}).get('actual_system_kw', estimate['system_kw']),
-                        'panel_count': estimate.get('cost_breakdown', {}).get('panels', {}).get('count', 0),
-                        'panel_wattage': estimate.get('cost_breakdown', {}).get('panels', {}).get('wattage', 450),
-                        'inverter_kw': estimate.get('cost_breakdown', {}).get('inverter', {}).get('capacity_kw', 0),
-                        'solar_cost': estimate['solar_cost'],
-                        'battery_cost': estimate.get('battery_cost', 0),
-                        'upfront_cost': estimate['upfront_cost'],
-                        'battery_type': st.session_state.get('battery_type', 'None'),
-                        'battery_details': {
-                            'num': st.session_state.get('battery_num', 0),
-                            'ah': st.session_state.get('battery_ah', 0),
-                            'voltage': st.session_state.get('battery_voltage', 12),
-                            'config': st.session_state.get('battery_config', '1S')
-                        }
-                    }
-                    
                     # Get Gemini model selection
-                    model_name = st.session_state.get('gemini_model', 'gemini-1.5-flash')
+                    model_name = ss.get('gemini_model', 'gemini-1.5-flash')
                     
+                    from utils.gemini_handler import generate_solar_recommendation
                     recommendation, error = generate_solar_recommendation(
-                        st.session_state['selected_county'],
+                        ss['selected_county'],
                         monthly_consumption,
-                        st.session_state['system_type'],
+                        ss['system_type'],
                         EQUIPMENT_CATALOG,
                         TARIFF_DATA,
                         ASSUMPTIONS,
                         ghi_value,
                         effective_rate,
-                        st.session_state['tariff_category'],
-                        existing_system_config=existing_config,
+                        ss['tariff_category'],
+                        existing_system_config=asdict(existing_config),
                         model_name=model_name
                     )
                     
@@ -1256,11 +1488,11 @@ elif current_page == "Analyses":
                         st.rerun()
         
         # Display AI Recommendation if available
-        if 'recommendation' in st.session_state:
-            st.markdown("---")
+        if 'recommendation' in ss:
+            st.divider()
             st.subheader("🤖 AI Recommendation Report")
             
-            rec = st.session_state['recommendation']
+            rec = ss['recommendation']
             
             # Executive Summary
             if "executive_summary" in rec:
@@ -1301,7 +1533,9 @@ elif current_page == "Analyses":
 # PAGE: COMPARE SYSTEMS
 # ============================================================================
 
-elif current_page == "Compare":
+# Fragment: changing the consumption input only reruns the comparison
+@st.fragment
+def render_compare():
     st.header("⚖️ Compare Solar System Sizes")
     st.write("Compare different system sizes side-by-side to find the perfect fit")
     
@@ -1322,7 +1556,7 @@ elif current_page == "Compare":
         step=50
     )
     
-    st.markdown("---")
+    st.divider()
     st.subheader("System Size Comparison")
     
     # Calculate 3 different system sizes
@@ -1362,19 +1596,30 @@ elif current_page == "Compare":
         coverage = (larger_estimate['annual_generation'] / (monthly_kwh * 12)) * 100
         st.metric("Coverage", f"{coverage:.0f}%")
     
-    st.markdown("---")
+    st.divider()
     st.info("💡 **Pro Tip**: The recommended system covers 100% of your usage. Conservative saves upfront but may not cover full consumption. Aggressive provides room for growth.")
 
 # ============================================================================
 # PAGE: CHAT ADVISOR
 # ============================================================================
 
-elif current_page == "Chat":
+def show_older_chat():
+    """Reveal another page of earlier chat messages"""
+    st.session_state.chat_shown = st.session_state.get('chat_shown', CHAT_PAGE_SIZE) + CHAT_PAGE_SIZE
+
+# Fragment: sending a message only reruns the chat, not the rest of the app
+@st.fragment
+def render_chat():
     st.header("💬 Chat with Jua Smart")
     st.write("Ask me anything about solar energy in Kenya - costs, installation, maintenance, regulations, and more!")
     
-    # Display existing chat history
-    for msg in st.session_state.chat_history:
+    # Display existing chat history (newest page only)
+    history = st.session_state.chat_history
+    shown = st.session_state.get('chat_shown', CHAT_PAGE_SIZE)
+    hidden = max(0, len(history) - shown)
+    if hidden:
+        st.button(f"⬆️ Load older messages ({hidden} hidden)", on_click=show_older_chat)
+    for msg in islice(history, hidden, None):
         with st.chat_message(msg["role"], avatar="👤" if msg["role"] == "user" else "☀️"):
             st.write(msg["content"])
     
@@ -1390,27 +1635,8 @@ elif current_page == "Chat":
         # Generate AI response
         with st.chat_message("assistant", avatar="☀️"):
             with st.spinner("Thinking..."):
+                streamed = False
                 try:
-                    # System Instruction
-                    system_instruction = """You are Jua Smart, a friendly and knowledgeable Kenyan solar energy advisor. 
-                    
-Your expertise includes:
-- Solar panel systems and sizing for Kenyan homes and businesses
-- EPRA (Energy and Petroleum Regulatory Authority) regulations and tariffs
-- Kenya's Net Metering regulations and procedures
-- Local solar equipment suppliers and costs in Kenya Shillings (KSh)
-- Installation best practices for Kenya's climate (both rainy and dry seasons)
-- Government incentives and tax exemptions for solar in Kenya
-- Battery storage options available in the Kenyan market
-- Maintenance requirements for solar systems in Kenya's conditions
-- County-specific solar irradiance data across Kenya
-- KPLC (Kenya Power) interconnection procedures
-- ROI calculations based on current KPLC electricity rates
-
-Provide practical, cost-effective advice specific to Kenya. Be concise but helpful. 
-Always mention costs in Kenya Shillings (KSh). Reference relevant Kenyan authorities like EPRA and KPLC when applicable.
-If you don't know something specific to Kenya, acknowledge it and provide general solar guidance instead."""
-
                     # Add context
                     context = ""
                     if 'monthly_consumption' in st.session_state:
@@ -1430,112 +1656,56 @@ If you don't know something specific to Kenya, acknowledge it and provide genera
                         if not api_key:
                             reply = "⚠️ OpenRouter API Key is required. Please set it in the sidebar settings or .env file."
                         else:
-                            import requests
-                            headers = {
-                                "Authorization": f"Bearer {api_key}",
-                                "Content-Type": "application/json",
-                                "HTTP-Referer": "https://juasmart.com",
-                                "X-Title": "Jua Smart Chat"
-                            }
-                            data = {
-                                "model": model_name,
-                                "messages": [
-                                    {"role": "system", "content": system_instruction},
-                                    {"role": "user", "content": full_prompt}
-                                ]
-                            }
-                            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=60)
-                            if response.status_code == 200:
-                                reply = response.json()['choices'][0]['message']['content']
-                            else:
-                                reply = f"❌ OpenRouter Error: {response.text}"
+                            reply, streamed = chat_reply(provider, model_name, full_prompt, api_key)
                                 
                     else: # Google Gemini
                         api_key = os.getenv("GEMINI_API_KEY")
                         if api_key:
-                            genai.configure(api_key=api_key)
                             model_name = st.session_state.get('gemini_model', 'gemini-1.5-flash')
-                            model = genai.GenerativeModel(
-                                model_name=model_name,
-                                system_instruction=system_instruction
-                            )
-                            response = model.generate_content(full_prompt)
-                            reply = response.text
+                            reply, streamed = chat_reply(provider, model_name, full_prompt, api_key)
                         else:
                             reply = "⚠️ Gemini API key not configured. Please set GEMINI_API_KEY in your .env file."
                             
                 except Exception as e:
                     reply = f"❌ Error: {str(e)}"
+                    streamed = False
                 
-                st.write(reply)
+                if not streamed:
+                    st.write(reply)
                 st.session_state.chat_history.append({"role": "assistant", "content": reply})
     
     # Helpful suggestions
-    if len(st.session_state.chat_history) == 0:
-        st.markdown("---")
+    if not st.session_state.chat_history:
+        st.divider()
         st.markdown("### 💡 Example Questions You Can Ask:")
         
         col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            **Cost & Sizing:**
-            - How much does a 5kW solar system cost in Kenya?
-            - What size solar system do I need for 300 kWh per month?
-            - Is solar worth it with current KPLC rates?
-            
-            **Installation:**
-            - How do I get started with solar installation?
-            - What are the best solar panel brands in Kenya?
-            - Do I need a permit to install solar panels?
-            """)
-        
-        with col2:
-            st.markdown("""
-            **Regulations:**
-            - How does net metering work in Kenya?
-            - What are EPRA's requirements for solar?
-            - Are there tax exemptions for solar equipment?
-            
-            **Maintenance:**
-            - How often should I clean my solar panels?
-            - What's the lifespan of solar panels in Kenya?
-            - Do panels work during rainy season?
-            """)
+        col1.markdown(SUGGESTIONS_LEFT)
+        col2.markdown(SUGGESTIONS_RIGHT)
     
     # Clear chat button
     if len(st.session_state.chat_history) > 0:
         if st.button("🗑️ Clear Chat History"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_LIMIT)
+            st.session_state.chat_shown = CHAT_PAGE_SIZE
             st.rerun()
 
 # ============================================================================
 # PAGE: EXPORT REPORTS
 # ============================================================================
 
-elif current_page == "Export":
-    st.header("📥 Export Your Reports")
-    st.write("Download your solar analysis in various formats")
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_report(county, monthly_consumption, system_type, ghi_value, effective_rate):
+    """Text report plus its UTF-8 bytes for the download button, built once per set of inputs"""
+    estimate = calculate_quick_roi(monthly_consumption, ghi_value, effective_rate)
+    annual_co2, trees, _, total_co2 = environmental_impact(estimate['annual_generation'])
     
-    if 'monthly_consumption' not in st.session_state:
-        st.warning("⚠️ Please complete an analysis first on the Home Dashboard")
-    else:
-        st.success("✅ Analysis data available for export")
-        
-        # Generate summary
-        monthly_consumption = st.session_state.get('monthly_consumption', 0)
-        ghi_value = st.session_state.get('ghi_value', 5.2)
-        effective_rate = st.session_state.get('effective_rate', 20.0)
-        estimate = calculate_quick_roi(monthly_consumption, ghi_value, effective_rate)
-        
-        st.markdown("### 📄 Report Summary")
-        
-        summary_data = f"""
+    summary = f"""
 **Jua Smart Solar Analysis Report**
 
-Location: {st.session_state.get('selected_county', 'N/A')}
+Location: {county}
 Monthly Consumption: {monthly_consumption:.0f} kWh
-System Type: {st.session_state.get('system_type', 'N/A')}
+System Type: {system_type}
 
 **System Recommendation:**
 - System Size: {estimate['system_kw']:.2f} kW
@@ -1548,40 +1718,63 @@ System Type: {st.session_state.get('system_type', 'N/A')}
 - Annual Savings: KSh {estimate['annual_savings']:,.0f}
 - Payback Period: {estimate['payback_years']:.1f} years
 - 25-Year NPV: KSh {estimate['npv_25yr']:,.0f}
-- Total ROI: {((estimate['npv_25yr'] + estimate['upfront_cost']) / estimate['upfront_cost'] * 100):.0f}%
+- Total ROI: {estimate['roi_percent']:.0f}%
 
 **Environmental Impact:**
-- Annual CO₂ Offset: {estimate['annual_generation'] * 0.4087 / 1000:.2f} tons
-- 25-Year CO₂ Offset: {estimate['annual_generation'] * 0.4087 / 1000 * 25:.2f} tons
-- Tree Equivalent: {int(estimate['annual_generation'] * 0.4087 / 1000 * 50):,} trees/year
+- Annual CO₂ Offset: {annual_co2:.2f} tons
+- 25-Year CO₂ Offset: {total_co2:.2f} tons
+- Tree Equivalent: {trees:,.0f} trees/year
 
 Report generated by Jua Smart Solar Advisor
 Always consult licensed installers for final quotes.
-        """
+    """
+    return summary, summary.encode('utf-8')
+
+def render_export():
+    st.header("📥 Export Your Reports")
+    st.write("Download your solar analysis in various formats")
+    ss = dict(st.session_state)
+    
+    if 'monthly_consumption' not in ss:
+        st.warning("⚠️ Please complete an analysis first on the Home Dashboard")
+    else:
+        st.success("✅ Analysis data available for export")
+        
+        # Generate summary
+        monthly_consumption = ss.get('monthly_consumption', 0)
+        ghi_value = ss.get('ghi_value', 5.2)
+        effective_rate = ss.get('effective_rate', 20.0)
+        
+        st.markdown("### 📄 Report Summary")
+        
+        summary_data, summary_bytes = build_report(
+            ss.get('selected_county', 'N/A'), monthly_consumption, ss.get('system_type', 'N/A'),
+            ghi_value, effective_rate
+        )
         
         st.text_area("Report Content", summary_data, height=400)
         
         # Download button
         st.download_button(
             label="📥 Download as Text File",
-            data=summary_data,
-            file_name=f"jua_smart_report_{st.session_state.get('selected_county', 'solar')}.txt",
-            mime="text/plain"
+            data=summary_bytes,
+            file_name=f"jua_smart_report_{ss.get('selected_county', 'solar')}.txt",
+            mime="text/plain; charset=utf-8"
         )
         
-        st.markdown("---")
+        st.divider()
         st.info("📊 **Coming Soon**: PDF reports with charts and detailed equipment specifications!")
 
 # ============================================================================
 # PAGE: ABOUT
 # ============================================================================
 
-elif current_page == "About":
+def render_about():
     st.header("How Jua Smart Works")
     st.markdown("**Jua** means 'sun' in Swahili ☀️ - Your intelligent solar advisor for Kenya")
     
     # How it works section
-    st.markdown("---")
+    st.divider()
     st.subheader("📋 Step-by-Step Guide")
     
     with st.expander("🏠 Step 1: Tell Us About Your Energy Needs", expanded=True):
@@ -1645,7 +1838,7 @@ elif current_page == "About":
         """)
     
     # Key information
-    st.markdown("---")
+    st.divider()
     st.subheader("🎯 What Makes Jua Smart Accurate?")
     
     col_acc1, col_acc2 = st.columns(2)
@@ -1681,7 +1874,7 @@ elif current_page == "About":
         """)
     
     # Important notes
-    st.markdown("---")
+    st.divider()
     st.warning("""
     ⚠️ **Important Limitations**
     
@@ -1709,7 +1902,7 @@ elif current_page == "About":
     col_info1, col_info2, col_info3 = st.columns(3)
     
     with col_info1:
-        st.metric("� Counties Covered", len([k for k in GHI_DATA.keys() if k not in ["All_Counties", "counties"]]) if GHI_DATA else 47)
+        st.metric("� Counties Covered", len(GHI_COUNTY_NAMES) if GHI_DATA else 47)
     
     with col_info2:
         st.metric("⚡ Version", "2.1")
@@ -1717,11 +1910,27 @@ elif current_page == "About":
     with col_info3:
         st.metric("🔋 Battery Types", "Lithium, Gel, Lead-Acid")
 
+# ============================================================================
+# PAGE ROUTER
+# ============================================================================
+
+PAGES = {
+    "Home": render_home,
+    "Calculator": render_calculator,
+    "Analyses": render_analyses,
+    "Compare": render_compare,
+    "Chat": render_chat,
+    "Export": render_export,
+    "About": render_about
+}
+
+PAGES.get(st.session_state.get('page', 'Home'), render_home)()
+
 # ============================================================================
 # FOOTER
 # ============================================================================
 
-st.markdown("---")
+st.divider()
 st.markdown("""
 <div style='text-align: center; color: #888; padding: 20px;'>
     <p><strong>Jua Smart v2.1</strong> - Powering Kenya with Solar Intelligence ☀️</p>
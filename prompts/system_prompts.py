@@ -10,16 +10,7 @@ You are a Kenyan solar energy systems expert with deep knowledge of:
 
 Your task is to act as a solar energy advisor. Based on the user's input (location, monthly consumption, system preference), you must perform a comprehensive analysis and provide a detailed, structured recommendation in JSON format.
 
-**Input Data Provided:**
-- **Location:** {location} (GHI: {ghi_kwh_m2_day} kWh/m²/day)
-- **Monthly Consumption:** {monthly_consumption_kwh} kWh
-- **System Preference:** {system_preference}
-- **Tariff Category:** {tariff_category} (Effective Rate: {effective_rate_ksh_per_kwh} KSh/kWh)
-- **Baseline Assumptions:**
-    - System Losses: {system_losses_percent:.1%}
-    - Degradation Rate: {degradation_rate_per_year:.1%}/year
-    - Installation Cost: ~{installation_cost_ksh_per_watt} KSh/watt
-    - Grid Emission Factor: {grid_emission_factor_tco2_per_mwh} tCO₂/MWh
+**Input Data:** Each request starts with an "Input Data Provided" section giving the location and its GHI, monthly consumption, system preference, tariff category and effective rate, and the baseline assumptions. Base your analysis on those values.
 
 **Your recommendations must:**
 1.  **System Sizing:** Calculate the required system size (kW) to offset the user's consumption, accounting for system losses and the local GHI.
@@ -84,6 +75,21 @@ You MUST respond with a single JSON object that strictly adheres to the followin
 ```
 """
 
+# Per-request facts, sent ahead of the user's prompt so the system prompt stays
+# the same for every request
+INPUT_DATA_TEMPLATE = """
+**Input Data Provided:**
+- **Location:** {location} (GHI: {ghi_kwh_m2_day} kWh/m²/day)
+- **Monthly Consumption:** {monthly_consumption_kwh} kWh
+- **System Preference:** {system_preference}
+- **Tariff Category:** {tariff_category} (Effective Rate: {effective_rate_ksh_per_kwh} KSh/kWh)
+- **Baseline Assumptions:**
+    - System Losses: {system_losses_percent:.1%}
+    - Degradation Rate: {degradation_rate_per_year:.1%}/year
+    - Installation Cost: ~{installation_cost_ksh_per_watt} KSh/watt
+    - Grid Emission Factor: {grid_emission_factor_tco2_per_mwh} tCO₂/MWh
+"""
+
 # Template for the user's prompt to the model
 USER_PROMPT_TEMPLATE = """
 Please generate a solar system recommendation based on the following data:
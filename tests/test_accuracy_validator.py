@@ -0,0 +1,81 @@
+import itertools
+import math
+import unittest
+
+import numpy as np
+
+from utils.accuracy_validator import (
+    _COST_PER_WATT_EDGES, _GHI_EDGES, _PAYBACK_EDGES, _SIZING_EDGES,
+    calculate_overall_confidence, validate_cost_per_watt, validate_ghi_location,
+    validate_payback_period, validate_recommendation_batch, validate_system_sizing,
+)
+
+MONTHLY_KWH = 100.0
+GHI = 5.0
+
+
+def around(edges, *extra):
+    """Each band edge, its float neighbours and values a little either side"""
+    values = list(extra)
+    for edge in edges:
+        edge = float(edge)
+        values += [edge, math.nextafter(edge, -math.inf), math.nextafter(edge, math.inf),
+                   edge - 0.01, edge + 0.01]
+    return sorted(set(values))
+
+
+def system_kw_for_ratio(ratio):
+    """System size giving the coverage ratio at MONTHLY_KWH and GHI"""
+    return ratio * MONTHLY_KWH * 12 / (GHI * 365 * 0.75)
+
+
+# Sizing edges are ratios; hit them through both the exact sizes and their neighbours
+SYSTEM_KW = around([system_kw_for_ratio(r) for r in _SIZING_EDGES], 0.0, 0.5, 5.0)
+PAYBACK_YEARS = around(_PAYBACK_EDGES + (15,), 0.0, 1.0, 7.0, 30.0)
+COST_PER_WATT = around(_COST_PER_WATT_EDGES + (150,), 0.0, 90.0, 200.0)
+GHI_VALUES = around(_GHI_EDGES + (4.0,), 3.0, 5.0, 7.0)
+
+
+class ValidateRecommendationBatchTest(unittest.TestCase):
+    def test_rules_match_scalar_validators_at_band_edges(self):
+        batch = validate_recommendation_batch(SYSTEM_KW, 7.0, 90.0, MONTHLY_KWH, GHI)
+        expected = [validate_system_sizing(kw, MONTHLY_KWH, GHI)[2] for kw in SYSTEM_KW]
+        np.testing.assert_array_equal(batch['sizing_confidence'], expected)
+
+        batch = validate_recommendation_batch(1.0, PAYBACK_YEARS, 90.0, MONTHLY_KWH, GHI)
+        expected = [validate_payback_period(years)[2] for years in PAYBACK_YEARS]
+        np.testing.assert_array_equal(batch['payback_confidence'], expected)
+
+        batch = validate_recommendation_batch(1.0, 7.0, COST_PER_WATT, MONTHLY_KWH, GHI)
+        expected = [validate_cost_per_watt(cost)[2] for cost in COST_PER_WATT]
+        np.testing.assert_array_equal(batch['cost_confidence'], expected)
+
+        batch = validate_recommendation_batch(1.0, 7.0, 90.0, MONTHLY_KWH, GHI_VALUES)
+        expected = [validate_ghi_location(ghi, "Nairobi")[2] for ghi in GHI_VALUES]
+        np.testing.assert_array_equal(batch['ghi_confidence'], expected)
+
+    def test_overall_and_validity_match_scalar_validators(self):
+        combos = list(itertools.product(SYSTEM_KW[::2], PAYBACK_YEARS[::2], COST_PER_WATT[::2], GHI_VALUES[::2]))
+        system_kw, payback_years, cost_per_watt, ghi = (np.array(column) for column in zip(*combos))
+        batch = validate_recommendation_batch(system_kw, payback_years, cost_per_watt, MONTHLY_KWH, ghi)
+
+        for i, (kw, years, cost, g) in enumerate(combos):
+            results = (
+                validate_system_sizing(kw, MONTHLY_KWH, g),
+                validate_payback_period(years),
+                validate_cost_per_watt(cost),
+                validate_ghi_location(g, "Nairobi"),
+            )
+            overall, level, _ = calculate_overall_confidence(results)
+            self.assertAlmostEqual(batch['overall_confidence'][i], overall, places=12)
+            self.assertEqual(batch['confidence_level'][i], level, combos[i])
+            self.assertEqual(bool(batch['is_valid'][i]), all(valid for valid, _, _ in results), combos[i])
+
+    def test_no_consumption_gives_zero_coverage(self):
+        batch = validate_recommendation_batch([0.0, 3.0], 7.0, 90.0, 0.0, GHI)
+        expected = [validate_system_sizing(kw, 0.0, GHI)[2] for kw in (0.0, 3.0)]
+        np.testing.assert_array_equal(batch['sizing_confidence'], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import json
+import math
+import os
+import unittest
+
+import numpy as np
+
+from utils.cost_calculator import (
+    calculate_system_cost, calculate_system_cost_batch, calculate_tariff_cost,
+    calculate_tariff_cost_batch, load_json_data,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def tier_walk_tariff_cost(monthly_consumption_kwh, tariff_data):
+    """The original tier-by-tier calculate_tariff_cost, kept as the pricing reference"""
+    if not tariff_data:
+        return 0.0, 0.0, "N/A"
+
+    tariffs = tariff_data.get("tariffs", {}).get("domestic", [])
+    pass_through_charge = tariff_data.get("pass_through_charges_ksh_per_kwh", 5.5)
+    vat_rate = tariff_data.get("vat_rate", 0.16)
+
+    total_base_cost = 0.0
+    remaining_consumption = monthly_consumption_kwh
+    tariff_category = "Unknown"
+
+    for tier in tariffs:
+        tier_name = tier["name"]
+        min_kwh, max_kwh = tier["range_kwh"]
+        rate = tier["base_rate_ksh_per_kwh"]
+
+        if monthly_consumption_kwh >= min_kwh:
+            if remaining_consumption > 0:
+                consumption_in_tier = min(remaining_consumption, max_kwh - min_kwh + 1)
+                if tier_name == "Lifeline":
+                    consumption_in_tier = min(monthly_consumption_kwh, max_kwh)
+                elif tier_name == "Ordinary 1":
+                    consumption_in_tier = min(remaining_consumption, max_kwh - 30)
+                elif tier_name == "Ordinary 2":
+                    consumption_in_tier = remaining_consumption
+
+                total_base_cost += consumption_in_tier * rate
+                remaining_consumption -= consumption_in_tier
+                tariff_category = tier_name
+
+                if remaining_consumption <= 0:
+                    break
+
+    subtotal = total_base_cost + monthly_consumption_kwh * pass_through_charge
+    total_monthly_cost = subtotal + subtotal * vat_rate
+    effective_rate = total_monthly_cost / monthly_consumption_kwh if monthly_consumption_kwh > 0 else 0.0
+
+    return total_monthly_cost, effective_rate, tariff_category
+
+
+def tier_edge_consumptions():
+    """Fractional kWh sweeping 0-110 plus the values right at and around each tier edge"""
+    values = [i / 20 for i in range(0, 2201)]
+    values += [0.001, 0.5]
+    for edge in (30, 31, 100, 101):
+        values += [edge, math.nextafter(edge, -math.inf), math.nextafter(edge, math.inf),
+                   edge - 0.001, edge + 0.001, edge + 0.5]
+    values += [150, 1000, 99999, 250000]
+    return sorted(v for v in values if v >= 0)
+
+
+class TariffCostTest(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, "epra_tariffs_2024_2026.json"), encoding="utf-8") as f:
+            self.plain_tariffs = json.load(f)
+        self.frozen_tariffs = load_json_data("epra_tariffs_2024_2026.json")
+
+    def assertPricesLikeTierWalk(self, kwh, tariff_data):
+        expected = tier_walk_tariff_cost(kwh, tariff_data)
+        cost, rate, category = calculate_tariff_cost(kwh, tariff_data)
+        self.assertEqual(category, expected[2], kwh)
+        self.assertTrue(math.isclose(cost, expected[0], rel_tol=1e-12, abs_tol=1e-9), (kwh, cost, expected))
+        self.assertTrue(math.isclose(rate, expected[1], rel_tol=1e-12, abs_tol=1e-9), (kwh, rate, expected))
+
+    def test_matches_tier_walk_across_tier_edges(self):
+        for tariff_data in (self.plain_tariffs, self.frozen_tariffs):
+            for kwh in tier_edge_consumptions():
+                self.assertPricesLikeTierWalk(kwh, tariff_data)
+
+    def test_usage_between_published_ranges_stays_in_lower_tier(self):
+        cost, _, category = calculate_tariff_cost(30.5, self.frozen_tariffs)
+        self.assertEqual(category, "Lifeline")
+        self.assertAlmostEqual(cost, 617.06, places=2)
+        self.assertEqual(calculate_tariff_cost(100.5, self.frozen_tariffs)[2], "Ordinary 1")
+
+    def test_plain_dict_edits_are_picked_up(self):
+        before = calculate_tariff_cost(150, self.plain_tariffs)[0]
+        self.plain_tariffs["vat_rate"] = 0
+        after = calculate_tariff_cost(150, self.plain_tariffs)[0]
+        self.assertLess(after, before)
+        self.assertPricesLikeTierWalk(150, self.plain_tariffs)
+
+
+class TariffCostBatchTest(unittest.TestCase):
+    def assertMatchesScalar(self, consumptions, tariff_data):
+        costs, rates, categories = calculate_tariff_cost_batch(consumptions, tariff_data)
+        expected = [calculate_tariff_cost(kwh, tariff_data) for kwh in consumptions]
+        np.testing.assert_allclose(costs, [cost for cost, _, _ in expected], rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(rates, [rate for _, rate, _ in expected], rtol=1e-12, atol=1e-9)
+        self.assertEqual(list(categories), [category for _, _, category in expected])
+
+    def test_matches_scalar_across_tier_edges(self):
+        tariff_data = load_json_data("epra_tariffs_2024_2026.json")
+        self.assertMatchesScalar(tier_edge_consumptions() + [-5.0], tariff_data)
+
+    def test_matches_scalar_with_gapped_and_overlapping_tiers(self):
+        tariff_data = {"tariffs": {"domestic": [
+            {"name": "Block A", "range_kwh": [0, 10], "base_rate_ksh_per_kwh": 10.0},
+            {"name": "Block B", "range_kwh": [15, 20], "base_rate_ksh_per_kwh": 20.0},
+            {"name": "Block C", "range_kwh": [16, 30], "base_rate_ksh_per_kwh": 30.0},
+        ]}}
+        consumptions = [i / 8 for i in range(0, 400)]
+        self.assertMatchesScalar(consumptions, tariff_data)
+        for kwh in consumptions:
+            cost, _, category = calculate_tariff_cost(kwh, tariff_data)
+            expected_cost, _, expected_category = tier_walk_tariff_cost(kwh, tariff_data)
+            self.assertEqual(category, expected_category, kwh)
+            self.assertTrue(math.isclose(cost, expected_cost, rel_tol=1e-12, abs_tol=1e-9), kwh)
+
+    def test_matches_scalar_without_tiers_or_data(self):
+        self.assertMatchesScalar([0.0, 30.5, 150.0], {"vat_rate": 0.16})
+        self.assertMatchesScalar([0.0, 30.5, 150.0], None)
+
+
+# calculate_system_cost_batch breakdown key -> path into calculate_system_cost's breakdown
+SYSTEM_COST_FIELDS = {
+    'panel_count': ('panels', 'count'),
+    'panel_cost': ('panels', 'cost'),
+    'inverter_capacity_kw': ('inverter', 'capacity_kw'),
+    'inverter_cost': ('inverter', 'cost'),
+    'vat': ('vat', 'amount'),
+    'mounting': ('mounting', 'cost'),
+    'safety': ('safety', 'cost'),
+    'installation': ('installation', 'cost'),
+    'bos': ('bos', 'cost'),
+    'actual_system_kw': ('actual_system_kw',),
+}
+
+
+def sizes_around(*edges_kw):
+    """Each size edge, its float neighbours and sizes a little either side"""
+    sizes = [0.0, 0.1]
+    for edge in edges_kw:
+        sizes += [edge, math.nextafter(edge, -math.inf), math.nextafter(edge, math.inf),
+                  edge - 0.01, edge + 0.01]
+    return sorted(size for size in set(sizes) if size >= 0)
+
+
+class SystemCostBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.assumptions = load_json_data("baseline_assumptions.json")
+
+    def assertMatchesScalar(self, sizes_kw, equipment_catalog):
+        totals, costs_per_watt, breakdown = calculate_system_cost_batch(sizes_kw, equipment_catalog, self.assumptions)
+        for i, size_kw in enumerate(sizes_kw):
+            total, cost_per_watt, expected = calculate_system_cost(size_kw, equipment_catalog, self.assumptions)
+            self.assertTrue(math.isclose(totals[i], total, rel_tol=1e-12), (size_kw, totals[i], total))
+            self.assertTrue(math.isclose(costs_per_watt[i], cost_per_watt, rel_tol=1e-12), size_kw)
+            for key, path in SYSTEM_COST_FIELDS.items():
+                value = expected
+                for part in path:
+                    value = value[part]
+                self.assertTrue(math.isclose(breakdown[key][i], value, rel_tol=1e-12), (size_kw, key))
+
+    def test_matches_scalar_at_panel_and_inverter_edges(self):
+        catalog = load_json_data("equipment_catalog.json")
+        capacities = sorted({inv["capacity_kw"] for inv in catalog["inverters"]})
+        panel_edges = [n * 0.45 for n in range(1, 12)]
+        self.assertMatchesScalar(sizes_around(*capacities, *panel_edges, 150.0), catalog)
+
+    def test_matches_scalar_for_fallback_inverter_sizing(self):
+        catalog = {"inverters": [
+            {"capacity_kw": 1.0, "price_ksh": 30000},
+            {"capacity_kw": 0.5},
+            {"model": "unrated"},
+        ]}
+        self.assertMatchesScalar(sizes_around(0.5, 1.0, 1.5, 3.0, 5.0, 7.0), catalog)
+
+    def test_missing_catalog_or_assumptions(self):
+        totals, costs_per_watt, breakdown = calculate_system_cost_batch([1.0, 3.0], None, self.assumptions)
+        self.assertEqual(list(totals), [0.0, 0.0])
+        self.assertEqual(list(costs_per_watt), [0.0, 0.0])
+        self.assertEqual(breakdown, {})
+        self.assertEqual(calculate_system_cost(3.0, None, self.assumptions), (0.0, 0.0, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import itertools
+import math
+import unittest
+
+from utils.cost_calculator import load_json_data
+from utils.data_validator import (
+    COST_PER_WATT, GENERATION_LIMIT, INVERTER_RATIO, MISSING_INPUT, SIZE_MISMATCH,
+    _generation_coefficient, validate_many, validate_recommendation,
+)
+
+# validate_recommendation error prefix -> the validate_many bit for the same check
+ERROR_BITS = (
+    ("Missing recommendation", MISSING_INPUT),
+    ("Technical Error: System size mismatch", SIZE_MISMATCH),
+    ("Technical Error: Inverter size", INVERTER_RATIO),
+    ("Price Error", COST_PER_WATT),
+    ("Physics Error", GENERATION_LIMIT),
+)
+
+
+def expected_bits(errors):
+    """validate_recommendation's error list as validate_many failure bits"""
+    bits = 0
+    for error in errors:
+        bits |= next(bit for prefix, bit in ERROR_BITS if error.startswith(prefix))
+    return bits
+
+
+def around(*edges):
+    """Each band edge, its float neighbours and values a little either side"""
+    values = []
+    for edge in edges:
+        values += [edge, math.nextafter(edge, -math.inf), math.nextafter(edge, math.inf),
+                   edge * 0.999, edge * 1.001]
+    return values
+
+
+def recommendation(system_kw=3.0, panel_count=6, panel_wattage_w=500, inverter_kw=3.6,
+                   cost_per_watt=90.0, ghi=5.0, annual_gen_kwh=4500.0):
+    return {
+        "system_sizing": {
+            "required_system_size_kw": system_kw,
+            "panel_count": panel_count,
+            "panel_wattage_w": panel_wattage_w,
+            "inverter_size_kw": inverter_kw,
+            "target_annual_generation_kwh": annual_gen_kwh,
+        },
+        "financial_analysis": {"cost_per_watt_ksh": cost_per_watt},
+        "location_analysis": {"ghi_kwh_m2_day": ghi},
+    }
+
+
+class ValidateManyTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = load_json_data("equipment_catalog.json")
+        self.assumptions = load_json_data("baseline_assumptions.json")
+
+    def assertMatchesScalar(self, recommendations):
+        failed = validate_many(recommendations, self.catalog, self.assumptions)
+        for rec, bits in zip(recommendations, failed):
+            errors = validate_recommendation(rec, self.catalog, self.assumptions)
+            self.assertEqual(int(bits), expected_bits(errors), (rec, errors))
+
+    def test_each_check_matches_scalar_at_band_edges(self):
+        min_cost, max_cost = self.assumptions["installation_cost_ksh_per_watt_range"]
+        max_gen = 3.0 * 5.0 * _generation_coefficient(self.assumptions) * 1.05
+        self.assertMatchesScalar(
+            [recommendation(system_kw=kw) for kw in around(0.95 * 3.0, 1.05 * 3.0) + [0.0]]
+            + [recommendation(inverter_kw=kw) for kw in around(1.1 * 3.0, 1.3 * 3.0) + [0.0]]
+            + [recommendation(cost_per_watt=c) for c in around(min_cost, max_cost) + [0.0]]
+            + [recommendation(annual_gen_kwh=gen) for gen in around(max_gen) + [0.0]]
+        )
+
+    def test_combined_checks_match_scalar(self):
+        grid = itertools.product(
+            (0.0, 2.5, 3.0, 3.2), (0, 6), (0, 500), (0.0, 3.3, 3.6, 4.0),
+            (0.0, 50.0, 90.0, 130.0), (0.0, 5.0), (0.0, 4500.0, 20000.0)
+        )
+        self.assertMatchesScalar([recommendation(*values) for values in grid])
+
+    def test_missing_inputs_match_scalar(self):
+        self.assertMatchesScalar([None, {}, {"system_sizing": None}, recommendation()])
+        failed = validate_many([recommendation(), None], None, self.assumptions)
+        self.assertEqual(list(failed), [MISSING_INPUT, MISSING_INPUT])
+
+
+if __name__ == "__main__":
+    unittest.main()
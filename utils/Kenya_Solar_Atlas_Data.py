@@ -2,32 +2,107 @@ import os
 import requests
 import json
 import numpy as np
-from pathlib import Path
+import pandas as pd
+from functools import lru_cache
 import rasterio
-from rasterio.mask import mask
+from rasterio.features import rasterize
+from rasterio.transform import from_bounds
+from rasterio.windows import Window, transform as window_transform
 import geopandas as gpd
 from shapely.geometry import mapping
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Raster rows read per window when reducing the GHI GeoTIFF by county
+_STRIP_ROWS = 1024
+
+# Create a simple pixel-to-coordinate mapping
+# Assuming the raster covers Kenya's bounding box
+_KENYA_BOUNDS = {
+    'west': 33.87,
+    'east': 41.86,
+    'south': -4.68,
+    'north': 5.0
+}
+
+@lru_cache(maxsize=8)
+def _kenya_transform(width, height):
+    """Affine transform stretching a width x height raster over _KENYA_BOUNDS"""
+    return from_bounds(
+        _KENYA_BOUNDS['west'],
+        _KENYA_BOUNDS['south'],
+        _KENYA_BOUNDS['east'],
+        _KENYA_BOUNDS['north'],
+        width,
+        height
+    )
+
+
+# One keep-alive session shared by the atlas and GeoJSON downloads
+@lru_cache(maxsize=None)
+def _http_session():
+    session = requests.Session()
+    session.headers["User-Agent"] = "jua-smart/2.1"
+    return session
+
+def _download_if_changed(url, filename, session=None):
+    """
+    Stream url to filename, skipping the transfer when the server reports it unchanged.
+    
+    The response's ETag / Last-Modified are kept in a '<filename>.meta.json'
+    sidecar and sent back as conditional headers on the next call; a 304
+    leaves the existing file in place. Returns True if a new copy was written.
+    """
+    meta_path = f"{filename}.meta.json"
+    headers = {}
+    if os.path.exists(filename) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    
+    http = session or _http_session()
+    with http.get(url, headers=headers, stream=True, timeout=(10, 120)) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        
+        # Write to a temp file and swap it in so a failed transfer never leaves a partial file
+        tmp_path = f"{filename}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+        os.replace(tmp_path, filename)
+        
+        with open(meta_path, 'w') as f:
+            json.dump({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }, f)
+    return True
 
 # Download kenya Solar data
-def download_kenya_solar_data():
+def download_kenya_solar_data(session=None):
     url = 'https://api.globalsolaratlas.info/download/Kenya/Kenya_GHI_poster-map_1000x1000mm-300dpi_v20191017.tif'
     filename = 'data/kenya_ghi.tif'
     
     try:
         # Create the 'data' directory if it doesn't exist
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        # Using requests to download the file (always overwrite)
-        response = requests.get(url)
-        response.raise_for_status()
-        with open(filename, 'wb') as f:
-            f.write(response.content)
-        print(f"File '{filename}' downloaded successfully (or updated).")
+        if _download_if_changed(url, filename, session):
+            print(f"File '{filename}' downloaded successfully (or updated).")
+        else:
+            print(f"File '{filename}' is up to date.")
     except Exception as e:
         print(f"Error downloading the file: {e}")
 
 # Download Kenya counties GeoJSON
-def get_kenya_counties_geojson():
+def get_kenya_counties_geojson(session=None):
     """
     Download Kenya counties boundary data from a public source.
     """
@@ -35,142 +110,145 @@ def get_kenya_counties_geojson():
     url = "https://raw.githubusercontent.com/mikelmaron/kenya-election-data/master/data/counties.geojson"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Save to file
-        with open("kenya_counties.geojson", "w") as f:
-            f.write(response.text)
-        
+        _download_if_changed(url, "kenya_counties.geojson", session)
         return "kenya_counties.geojson"
     except Exception as e:
         print(f"Error downloading counties data: {e}")
         print("You may need to provide a kenya_counties.geojson file manually")
         return None
 
+@lru_cache(maxsize=4)
+def _load_counties(path, mtime):
+    """County boundaries with a CRS set; mtime is part of the key so edits to the file are picked up"""
+    counties = gpd.read_file(path)
+    
+    # Ensure the GeoDataFrame has a CRS
+    if counties.crs is None:
+        counties = counties.set_crs("EPSG:4326")
+    return counties
+
+def _county_names(counties):
+    """County name per row: first non-empty of COUNTY_NAM, name, NAME, else County_<index>"""
+    names = pd.Series([f"County_{idx}" for idx in counties.index], index=counties.index)
+    # Lowest-priority column first so higher-priority columns overwrite it
+    for column in ('NAME', 'name', 'COUNTY_NAM'):
+        if column in counties.columns:
+            values = counties[column]
+            names = values.where(values.notna() & (values != ''), names)
+    return names
+
 # Extract irradiance data by county
-def extract_irradiance_by_county(tif_path, counties_geojson_path):
+def extract_irradiance_by_county(tif_path, counties_geojson_path, verbose=False):
     """
     Extract average solar irradiance values for each county in Kenya.
     
     Args:
         tif_path: Path to the GeoTIFF file with solar irradiance data
         counties_geojson_path: Path to GeoJSON file with county boundaries
+        verbose: Print raster diagnostics and a line per county
     
     Returns:
         Dictionary with county names and their average irradiance values
     """
     # Read county boundaries
-    counties = gpd.read_file(counties_geojson_path)
-    
-    # Ensure the GeoDataFrame has a CRS
-    if counties.crs is None:
-        counties = counties.set_crs("EPSG:4326")
+    counties = _load_counties(counties_geojson_path, os.path.getmtime(counties_geojson_path))
     
     results = []
     
     # Open the GeoTIFF file
     with rasterio.open(tif_path) as src:
-        print(f"GeoTIFF CRS: {src.crs}")
-        print(f"GeoTIFF bounds: {src.bounds}")
-        print(f"GeoTIFF shape: {src.shape}")
-        print(f"GeoTIFF dtype: {src.dtypes[0] if src.dtypes else 'Unknown'}")
-        
-        # Read the entire raster into memory
-        raster_data = src.read(1)
-        print(f"Raster data type: {raster_data.dtype}")
-        print(f"Raster data range: [{np.nanmin(raster_data)}, {np.nanmax(raster_data)}]")
+        if verbose:
+            print(f"GeoTIFF CRS: {src.crs}")
+            print(f"GeoTIFF bounds: {src.bounds}")
+            print(f"GeoTIFF shape: {src.shape}")
+            print(f"GeoTIFF dtype: {src.dtypes[0] if src.dtypes else 'Unknown'}")
         
         # Since the raster has no georeferencing, we'll use a simple approach:
         # Normalize the raster to geographic bounds that encompass Kenya
         # Kenya bounds approximately: lat -4 to 5, lon 34 to 42
         
-        raster_height, raster_width = raster_data.shape
-        
-        # Create a simple pixel-to-coordinate mapping
-        # Assuming the raster covers Kenya's bounding box
-        kenya_bounds = {
-            'west': 33.87,
-            'east': 41.86,
-            'south': -4.68,
-            'north': 5.0
-        }
+        raster_height, raster_width = src.shape
         
         # Create a simple rasterio-like transform for the raster
-        from rasterio.transform import from_bounds
-        transform = from_bounds(
-            kenya_bounds['west'], 
-            kenya_bounds['south'],
-            kenya_bounds['east'],
-            kenya_bounds['north'],
-            raster_width,
-            raster_height
-        )
-        
-        print(f"Using transform with Kenya bounds approximation")
-        
-        # Process each county
-        for idx, county in counties.iterrows():
-            try:
-                # Get county name
-                county_name = county.get('COUNTY_NAM') or county.get('name') or county.get('NAME') or f"County_{idx}"
-                
-                # Get the geometry
-                geom = county.geometry
-                
-                # Use rasterio's window feature to extract pixels
-                from rasterio.windows import from_bounds as window_from_bounds
-                
-                bounds = geom.bounds  # (minx, miny, maxx, maxy)
-                
-                # Convert geographic bounds to pixel indices
-                # This is a simplified approach since we don't have proper georeferencing
-                x_min, y_min, x_max, y_max = bounds
-                
-                # Map coordinates to pixel indices
-                pixel_x_min = max(0, int((x_min - kenya_bounds['west']) / (kenya_bounds['east'] - kenya_bounds['west']) * raster_width))
-                pixel_x_max = min(raster_width, int((x_max - kenya_bounds['west']) / (kenya_bounds['east'] - kenya_bounds['west']) * raster_width))
-                pixel_y_max = max(0, int((kenya_bounds['north'] - y_min) / (kenya_bounds['north'] - kenya_bounds['south']) * raster_height))
-                pixel_y_min = min(raster_height, int((kenya_bounds['north'] - y_max) / (kenya_bounds['north'] - kenya_bounds['south']) * raster_height))
-                
-                # Ensure valid ranges
-                if pixel_x_min >= pixel_x_max or pixel_y_min >= pixel_y_max:
-                    print(f"✗ {county_name}: Invalid pixel range")
-                    continue
-                
-                # Extract the data window
-                data_window = raster_data[pixel_y_min:pixel_y_max, pixel_x_min:pixel_x_max]
+        transform = _kenya_transform(raster_width, raster_height)
+        
+        if verbose:
+            print(f"Using transform with Kenya bounds approximation")
+        
+        # Each county polygon is burned into a label raster (0 = outside all counties)
+        # so each pixel is counted only for the county it actually falls in
+        shapes = [(mapping(geom), i + 1) for i, geom in enumerate(counties.geometry)]
+        n_labels = len(counties) + 1
+        label_dtype = 'uint8' if n_labels <= 255 else 'int32'
+        
+        # Handle different data types with proper scaling. Pixels stay in their
+        # native dtype; the scale is applied to the per-county results instead
+        is_uint8 = src.dtypes[0] == 'uint8'
+        # Apply scaling: map 0–255 → 0–6 kWh/m²/day
+        scale_factor = 5.5 / 255.0 if is_uint8 else 1.0
+        
+        counts = np.zeros(n_labels, dtype=np.int64)
+        sums = np.zeros(n_labels)
+        sums_sq = np.zeros(n_labels)
+        mins = np.full(n_labels, np.inf)
+        maxs = np.full(n_labels, -np.inf)
+        data_min, data_max = np.inf, -np.inf
+        
+        # Read, label and reduce the raster one strip of rows at a time, so only
+        # a strip (not the whole poster-sized raster) is ever held in memory
+        for row in range(0, raster_height, _STRIP_ROWS):
+            window = Window(0, row, raster_width, min(_STRIP_ROWS, raster_height - row))
+            raster_data = src.read(1, window=window)
+            # GHI needs nowhere near float64 precision; halve the pixels' memory footprint
+            if raster_data.dtype == np.float64:
+                raster_data = raster_data.astype(np.float32)
+            data_min = min(data_min, np.nanmin(raster_data))
+            data_max = max(data_max, np.nanmax(raster_data))
+            
+            labels = rasterize(
+                shapes, out_shape=raster_data.shape, transform=window_transform(window, transform),
+                fill=0, dtype=label_dtype
+            )
+            if is_uint8:
+                valid = (raster_data > 0) & (labels > 0)
+            else:
+                valid = ~np.isnan(raster_data) & (labels > 0)
+            values = raster_data[valid]
+            county_ids = labels[valid]
+            
+            counts += np.bincount(county_ids, minlength=n_labels)
+            sums += np.bincount(county_ids, weights=values, minlength=n_labels)
+            sums_sq += np.bincount(county_ids, weights=np.square(values, dtype=np.float64), minlength=n_labels)
+            np.minimum.at(mins, county_ids, values)
+            np.maximum.at(maxs, county_ids, values)
+        
+        if verbose:
+            print(f"Raster data range: [{data_min}, {data_max}]")
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+            stds = np.sqrt(np.maximum(sums_sq / counts - means * means, 0.0)) * scale_factor
+        means *= scale_factor
+        mins *= scale_factor
+        maxs *= scale_factor
+        
+        for label, county_name in enumerate(_county_names(counties), start=1):
+            if counts[label] > 0:
+                avg_irradiance = means[label]
                 
-                # Handle different data types with proper scaling
-                if data_window.dtype == np.uint8:
-                    valid_pixels = data_window[data_window > 0].astype(float)
-                    # Apply scaling: map 0–255 → 0–6 kWh/m²/day
-                    scale_factor = 5.5 / 255.0
-                    valid_pixels = valid_pixels * scale_factor
-                else:
-                    valid_pixels = data_window[~np.isnan(data_window)]
+                results.append({
+                    "county": county_name,
+                    "avg_irradiance_kwh_m2_day": round(avg_irradiance, 2),
+                    "min_irradiance_kwh_m2_day": round(mins[label], 2),
+                    "max_irradiance_kwh_m2_day": round(maxs[label], 2),
+                    "std_irradiance_kwh_m2_day": round(stds[label], 2),
+                    "pixel_count": int(counts[label])
+                })
                 
-                if len(valid_pixels) > 0:
-                    avg_irradiance = float(np.mean(valid_pixels))
-                    min_irradiance = float(np.min(valid_pixels))
-                    max_irradiance = float(np.max(valid_pixels))
-                    std_irradiance = float(np.std(valid_pixels))
-                    
-                    results.append({
-                        "county": county_name,
-                        "avg_irradiance_kwh_m2_day": round(avg_irradiance, 2),
-                        "min_irradiance_kwh_m2_day": round(min_irradiance, 2),
-                        "max_irradiance_kwh_m2_day": round(max_irradiance, 2),
-                        "std_irradiance_kwh_m2_day": round(std_irradiance, 2),
-                        "pixel_count": len(valid_pixels)
-                    })
-                    
+                if verbose:
                     print(f"✓ {county_name}: {avg_irradiance:.2f} kWh/m²/day")
-                else:
-                    print(f"✗ {county_name}: No valid data")
-                    
-            except Exception as e:
-                print(f"✗ Error processing {county_name}: {e}")
+            elif verbose:
+                print(f"✗ {county_name}: No valid data")
     
     return results
 
@@ -178,7 +256,8 @@ def extract_irradiance_by_county(tif_path, counties_geojson_path):
 def create_kenya_counties_irradiance_json(
     tif_path="data/kenya_ghi.tif",
     counties_geojson_path="data/kenya_counties.geojson",
-    output_json="data/kenya_counties_irradiance.json"
+    output_json="data/kenya_counties_irradiance.json",
+    verbose=False
 ):
     """
     Main function to create the final JSON file with county irradiance data.
@@ -187,6 +266,7 @@ def create_kenya_counties_irradiance_json(
         tif_path: Path to solar irradiance GeoTIFF file
         counties_geojson_path: Path to counties GeoJSON file
         output_json: Output JSON file path
+        verbose: Pass through to extract_irradiance_by_county for per-county output
     """
     print("=" * 60)
     print("Kenya Solar Irradiance Data Processor")
@@ -212,7 +292,7 @@ def create_kenya_counties_irradiance_json(
     print(f"   Counties: {counties_geojson_path}")
     
     # Extract irradiance data
-    irradiance_data = extract_irradiance_by_county(tif_path, counties_geojson_path)
+    irradiance_data = extract_irradiance_by_county(tif_path, counties_geojson_path, verbose=verbose)
     
     if irradiance_data:
         # Create final JSON structure
@@ -229,8 +309,12 @@ def create_kenya_counties_irradiance_json(
         }
         
         # Save to JSON
-        with open(output_json, 'w') as f:
-            json.dump(output, f, indent=2)
+        if orjson is not None:
+            with open(output_json, 'wb') as f:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(output_json, 'w') as f:
+                json.dump(output, f, indent=2)
         
         print(f"\n✅ Success! Created {output_json}")
         print(f"   Total counties processed: {len(irradiance_data)}")
@@ -249,4 +333,4 @@ if __name__ == "__main__":
 
     
     # Run the main function
-    create_kenya_counties_irradiance_json()
\ No newline at end of file
+    create_kenya_counties_irradiance_json(verbose=True)
\ No newline at end of file
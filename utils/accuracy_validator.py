@@ -3,6 +3,67 @@ Accuracy Validator for Solar Recommendations
 Validates AI-generated recommendations and provides confidence scores
 """
 
+from bisect import bisect_right
+from functools import lru_cache
+from math import inf, nextafter
+
+import numpy as np
+
+# Each rule is a table: ascending band edges, looked up with bisect_right, and one
+# (warning template, confidence) row per band. An edge of nextafter(x, inf) makes
+# the band above it start strictly after x, i.e. "value > x".
+
+# System size coverage ratio (expected generation / consumption)
+_SIZING_EDGES = (0.7, 0.9, nextafter(1.2, inf), nextafter(1.5, inf))
+_SIZING_BANDS = (
+    ("⚠️ System may be undersized ({ratio:.1%} of consumption)", 1.0 - 0.15),
+    (None, 1.0),
+    ("✅ Optimal sizing ({ratio:.1%} coverage)", 1.0),
+    (None, 1.0),
+    ("⚠️ System may be oversized ({ratio:.1%} of consumption)", 1.0 - 0.2),
+)
+_SIZING_OPTIMAL_BAND = 2
+
+_PAYBACK_EDGES = (3, 5, nextafter(10, inf), nextafter(15, inf))
+_PAYBACK_BANDS = (
+    ("⚠️ Payback period seems too optimistic (< 3 years)", 0.4),
+    (None, 0.8),
+    ("✅ Realistic payback period (5-10 years)", 1.0),
+    (None, 0.8),
+    ("⚠️ Payback period is very long (> 15 years)", 0.5),
+)
+
+# Typical range in Kenya: 55-120 KSh/W
+_COST_PER_WATT_EDGES = (55, 70, nextafter(110, inf), nextafter(150, inf))
+_COST_PER_WATT_BANDS = (
+    ("⚠️ Cost seems too low - verify equipment quality", 0.5),
+    (None, 0.8),
+    ("✅ Cost is within typical market range", 1.0),
+    (None, 0.8),
+    ("⚠️ Cost is higher than market average", 0.6),
+)
+
+# Kenya's GHI typically ranges from 4.5 to 6.5 kWh/m²/day
+_GHI_EDGES = (4.5, 5.5)
+_GHI_BANDS = (
+    ("⚠️ Low solar potential in {location} (GHI: {ghi:.1f})", 0.7),
+    ("✅ Good solar potential in {location} (GHI: {ghi:.1f})", 0.9),
+    ("✅ Excellent solar potential in {location} (GHI: {ghi:.1f})", 1.0),
+)
+
+# Overall confidence level and display color; each edge is the lowest score of the band above it
+_LEVEL_EDGES = (0.5, 0.7, 0.85)
+_LEVEL_BANDS = (("Low", "red"), ("Moderate", "orange"), ("Good", "lightgreen"), ("High", "green"))
+
+
+def _band(edges, bands, value, **fields):
+    """(band index, warnings list, confidence) for value in a rule table"""
+    i = bisect_right(edges, value)
+    template, confidence = bands[i]
+    warnings = [template.format(**fields)] if template else []
+    return i, warnings, confidence
+
+
 def validate_system_sizing(system_kw, monthly_consumption_kwh, ghi):
     """
     Validates if system size is appropriate for consumption
@@ -16,24 +77,9 @@ def validate_system_sizing(system_kw, monthly_consumption_kwh, ghi):
     
     coverage_ratio = expected_total_generation / annual_consumption if annual_consumption > 0 else 0
     
-    warnings = []
-    confidence = 1.0
+    band, warnings, confidence = _band(_SIZING_EDGES, _SIZING_BANDS, coverage_ratio, ratio=coverage_ratio)
     
-    # Check for oversizing
-    if coverage_ratio > 1.5:
-        warnings.append(f"⚠️ System may be oversized ({coverage_ratio:.1%} of consumption)")
-        confidence -= 0.2
-    
-    # Check for undersizing
-    if coverage_ratio < 0.7:
-        warnings.append(f"⚠️ System may be undersized ({coverage_ratio:.1%} of consumption)")
-        confidence -= 0.15
-    
-    # Optimal range
-    if 0.9 <= coverage_ratio <= 1.2:
-        warnings.append(f"✅ Optimal sizing ({coverage_ratio:.1%} coverage)")
-    
-    return len(warnings) == 1 and "✅" in warnings[0], warnings, max(0, min(1, confidence))
+    return band == _SIZING_OPTIMAL_BAND, warnings, max(0, min(1, confidence))
 
 
 def validate_payback_period(payback_years):
@@ -41,20 +87,7 @@ def validate_payback_period(payback_years):
     Validates if payback period is realistic
     Returns: (is_valid, warning_message, confidence_score)
     """
-    warnings = []
-    confidence = 1.0
-    
-    if payback_years < 3:
-        warnings.append("⚠️ Payback period seems too optimistic (< 3 years)")
-        confidence = 0.4
-    elif payback_years > 15:
-        warnings.append("⚠️ Payback period is very long (> 15 years)")
-        confidence = 0.5
-    elif 5 <= payback_years <= 10:
-        warnings.append("✅ Realistic payback period (5-10 years)")
-        confidence = 1.0
-    else:
-        confidence = 0.8
+    _, warnings, confidence = _band(_PAYBACK_EDGES, _PAYBACK_BANDS, payback_years)
     
     return 3 <= payback_years <= 15, warnings, confidence
 
@@ -64,21 +97,7 @@ def validate_cost_per_watt(cost_per_watt):
     Validates if cost per watt is within market range for Kenya
     Returns: (is_valid, warning_message, confidence_score)
     """
-    warnings = []
-    confidence = 1.0
-    
-    # Typical range in Kenya: 55-120 KSh/W
-    if cost_per_watt < 55:
-        warnings.append("⚠️ Cost seems too low - verify equipment quality")
-        confidence = 0.5
-    elif cost_per_watt > 150:
-        warnings.append("⚠️ Cost is higher than market average")
-        confidence = 0.6
-    elif 70 <= cost_per_watt <= 110:
-        warnings.append("✅ Cost is within typical market range")
-        confidence = 1.0
-    else:
-        confidence = 0.8
+    _, warnings, confidence = _band(_COST_PER_WATT_EDGES, _COST_PER_WATT_BANDS, cost_per_watt)
     
     is_valid = 55 <= cost_per_watt <= 150
     
@@ -90,19 +109,7 @@ def validate_ghi_location(ghi, location):
     Validates if GHI value is reasonable for Kenya
     Returns: (is_valid, warning_message, confidence_score)
     """
-    warnings = []
-    confidence = 1.0
-    
-    # Kenya's GHI typically ranges from 4.5 to 6.5 kWh/m²/day
-    if ghi < 4.5:
-        warnings.append(f"⚠️ Low solar potential in {location} (GHI: {ghi:.1f})")
-        confidence = 0.7
-    elif ghi >= 5.5:
-        warnings.append(f"✅ Excellent solar potential in {location} (GHI: {ghi:.1f})")
-        confidence = 1.0
-    else:
-        warnings.append(f"✅ Good solar potential in {location} (GHI: {ghi:.1f})")
-        confidence = 0.9
+    _, warnings, confidence = _band(_GHI_EDGES, _GHI_BANDS, ghi, location=location, ghi=ghi)
     
     is_valid = ghi >= 4.0
     
@@ -120,15 +127,13 @@ def calculate_overall_confidence(validation_results):
         return 0.5, "Moderate", "orange"
     
     overall = sum(confidences) / len(confidences)
+    level, color = _LEVEL_BANDS[bisect_right(_LEVEL_EDGES, overall)]
     
-    if overall >= 0.85:
-        return overall, "High", "green"
-    elif overall >= 0.7:
-        return overall, "Good", "lightgreen"
-    elif overall >= 0.5:
-        return overall, "Moderate", "orange"
-    else:
-        return overall, "Low", "red"
+    return overall, level, color
+
+
+# Every possible rating, indexed by the number of filled stars (0-5)
+_STARS = tuple("⭐" * n + "☆" * (5 - n) for n in range(6))
 
 
 def get_confidence_stars(confidence):
@@ -136,8 +141,26 @@ def get_confidence_stars(confidence):
     Converts confidence score to star rating
     Returns: star string (e.g., "⭐⭐⭐⭐⭐")
     """
-    stars = int(round(confidence * 5))
-    return "⭐" * stars + "☆" * (5 - stars)
+    return _STARS[int(round(max(0.0, min(1.0, confidence)) * 5))]
+
+
+@lru_cache(maxsize=512)
+def _validate_core(system_kw, payback_years, total_cost, monthly_consumption_kwh, ghi, location):
+    """Run the four validations; cached, so warning lists come back as tuples"""
+    cost_per_watt = total_cost / (system_kw * 1000) if system_kw > 0 else 0
+    
+    validation_list = (
+        validate_system_sizing(system_kw, monthly_consumption_kwh, ghi),
+        validate_payback_period(payback_years),
+        validate_cost_per_watt(cost_per_watt),
+        validate_ghi_location(ghi, location),
+    )
+    overall_conf, conf_level, color = calculate_overall_confidence(validation_list)
+    
+    return (
+        tuple((valid, tuple(warnings), conf) for valid, warnings, conf in validation_list),
+        overall_conf, conf_level, color
+    )
 
 
 def validate_recommendation(recommendation, monthly_consumption_kwh, ghi, location):
@@ -163,44 +186,81 @@ def validate_recommendation(recommendation, monthly_consumption_kwh, ghi, locati
         payback_years = financial.get('payback_period_years', 0)
         total_cost = financial.get('total_upfront_cost_ksh', 0)
         
-        cost_per_watt = total_cost / (system_kw * 1000) if system_kw > 0 else 0
-        
-        # Run validations
-        validation_list = []
-        
-        # System sizing
-        valid_sizing, sizing_warnings, sizing_conf = validate_system_sizing(
-            system_kw, monthly_consumption_kwh, ghi
+        # Repeat calls with the same figures (e.g. UI reruns) are served from the cache
+        validations, overall_conf, conf_level, color = _validate_core(
+            system_kw, payback_years, total_cost, monthly_consumption_kwh, ghi, location
         )
-        validation_list.append((valid_sizing, sizing_warnings, sizing_conf))
-        results['warnings'].extend(sizing_warnings)
-        
-        # Payback period
-        valid_payback, payback_warnings, payback_conf = validate_payback_period(payback_years)
-        validation_list.append((valid_payback, payback_warnings, payback_conf))
-        results['warnings'].extend(payback_warnings)
-        
-        # Cost per watt
-        valid_cost, cost_warnings, cost_conf = validate_cost_per_watt(cost_per_watt)
-        validation_list.append((valid_cost, cost_warnings, cost_conf))
-        results['warnings'].extend(cost_warnings)
-        
-        # GHI/Location
-        valid_ghi, ghi_warnings, ghi_conf = validate_ghi_location(ghi, location)
-        validation_list.append((valid_ghi, ghi_warnings, ghi_conf))
-        results['warnings'].extend(ghi_warnings)
-        
-        # Calculate overall confidence
-        overall_conf, conf_level, color = calculate_overall_confidence(validation_list)
         
         results['overall_confidence'] = overall_conf
         results['confidence_level'] = conf_level
         results['confidence_stars'] = get_confidence_stars(overall_conf)
         results['color'] = color
-        results['validations'] = validation_list
+        results['validations'] = [(valid, list(warnings), conf) for valid, warnings, conf in validations]
+        results['warnings'] = [w for _, warnings, _ in validations for w in warnings]
         
     except Exception as e:
         results['warnings'].append(f"⚠️ Validation error: {str(e)}")
         results['confidence_level'] = "Unknown"
     
     return results
+
+
+def _band_confidences(edges, bands, values):
+    """Confidence per value for a rule table; the array form of _band"""
+    confidences = np.array([confidence for _, confidence in bands])
+    return confidences[np.searchsorted(np.array(edges), values, side='right')]
+
+
+_CONFIDENCE_LEVEL_EDGES = np.array(_LEVEL_EDGES)
+_CONFIDENCE_LEVELS = np.array([level for level, _ in _LEVEL_BANDS], dtype=object)
+
+
+def validate_recommendation_batch(system_kw, payback_years, cost_per_watt, monthly_consumption_kwh, ghi):
+    """
+    Vectorized confidence scoring for many candidate systems at once
+    
+    Applies the same rule tables as validate_recommendation to arrays of
+    system sizes, payback periods and costs per watt (consumption and GHI may
+    be scalars or arrays). Warning strings are not built.
+    Returns: dict of arrays with per-rule and overall confidence, level and validity
+    """
+    system_kw = np.asarray(system_kw, dtype=np.float64)
+    payback_years = np.asarray(payback_years, dtype=np.float64)
+    cost_per_watt = np.asarray(cost_per_watt, dtype=np.float64)
+    annual_consumption = np.asarray(monthly_consumption_kwh, dtype=np.float64) * 12
+    ghi = np.asarray(ghi, dtype=np.float64)
+    
+    expected_total_generation = system_kw * (ghi * 365 * 0.75)
+    coverage_ratio = np.divide(
+        expected_total_generation, annual_consumption,
+        out=np.zeros(np.broadcast(expected_total_generation, annual_consumption).shape),
+        where=annual_consumption > 0
+    )
+    
+    sizing_band = np.searchsorted(np.array(_SIZING_EDGES), coverage_ratio, side='right')
+    sizing_conf = np.clip(np.array([c for _, c in _SIZING_BANDS])[sizing_band], 0, 1)
+    payback_conf = _band_confidences(_PAYBACK_EDGES, _PAYBACK_BANDS, payback_years)
+    cost_conf = _band_confidences(_COST_PER_WATT_EDGES, _COST_PER_WATT_BANDS, cost_per_watt)
+    ghi_conf = _band_confidences(_GHI_EDGES, _GHI_BANDS, ghi)
+    
+    sizing_conf, payback_conf, cost_conf, ghi_conf = np.broadcast_arrays(
+        sizing_conf, payback_conf, cost_conf, ghi_conf
+    )
+    overall = (sizing_conf + payback_conf + cost_conf + ghi_conf) / 4
+    
+    is_valid = (
+        (sizing_band == _SIZING_OPTIMAL_BAND)
+        & (payback_years >= 3) & (payback_years <= 15)
+        & (cost_per_watt >= 55) & (cost_per_watt <= 150)
+        & (ghi >= 4.0)
+    )
+    
+    return {
+        'sizing_confidence': sizing_conf,
+        'payback_confidence': payback_conf,
+        'cost_confidence': cost_conf,
+        'ghi_confidence': ghi_conf,
+        'overall_confidence': overall,
+        'confidence_level': _CONFIDENCE_LEVELS[np.searchsorted(_CONFIDENCE_LEVEL_EDGES, overall, side='right')],
+        'is_valid': is_valid
+    }
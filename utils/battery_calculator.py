@@ -2,6 +2,64 @@
 Advanced Battery Storage Calculator
 Calculates battery requirements, costs, and lifecycle analysis
 """
+from bisect import bisect_left
+from dataclasses import dataclass
+
+# Standard battery sizes on the Kenyan market, ascending
+KWH_BATTERY_SIZES = (2.56, 5.12, 7.68, 10.24, 15.36, 20.48)  # kWh-based lithium (e.g. 5.12kWh Menred)
+LITHIUM_AH_SIZES = (50, 100, 150, 200, 300)  # 12V lithium units
+LEAD_AH_SIZES = (50, 80, 100, 120, 150, 200)  # 12V Lead-Acid/Gel, max 200Ah
+
+
+@dataclass(frozen=True)
+class BatteryRequirements:
+    backup_energy_kwh: float
+    hourly_consumption: float
+    backup_hours: float
+
+
+@dataclass(frozen=True)
+class BatterySpecs:
+    """Battery bank sizing; recommended_kwh is only set for kWh-based lithium banks"""
+    total_capacity_kwh: float
+    usable_capacity_kwh: float
+    capacity_ah: float
+    recommended_ah: int
+    system_voltage: int
+    battery_voltage_unit: int
+    batteries_in_series: int
+    parallel_strings: int
+    total_batteries: int
+    depth_of_discharge: float
+    battery_type: str
+    configuration: str
+    is_kwh_based: bool
+    recommended_kwh: float = 0
+
+
+@dataclass(frozen=True)
+class BatteryCost:
+    initial_cost_ksh: float
+    cost_per_kwh: int
+    cycle_life: int
+    warranty_years: int
+
+
+@dataclass(frozen=True)
+class LifecycleCost:
+    initial_cost: float
+    replacements_needed: int
+    replacement_cost: float
+    maintenance_cost: float
+    total_lifecycle_cost: float
+    levelized_cost_per_kwh: float
+    cost_per_year: float
+
+
+def _smallest_size_at_least(sizes, needed):
+    """Smallest standard size >= needed, or the largest size if none is big enough"""
+    i = bisect_left(sizes, needed)
+    return sizes[i] if i < len(sizes) else sizes[-1]
 
 def calculate_battery_requirements(daily_consumption_kwh, backup_hours, system_type):
     """
@@ -13,7 +71,7 @@ def calculate_battery_requirements(daily_consumption_kwh, backup_hours, system_t
         system_type: 'Hybrid' or 'Off-grid'
     
     Returns:
-        dict with battery specifications
+        BatteryRequirements record
     """
     # Calculate hourly consumption
     hourly_consumption = daily_consumption_kwh / 24
@@ -26,11 +84,11 @@ def calculate_battery_requirements(daily_consumption_kwh, backup_hours, system_t
         autonomy_days = 2
         backup_energy_kwh = daily_consumption_kwh * autonomy_days
     
-    return {
-        'backup_energy_kwh': backup_energy_kwh,
-        'hourly_consumption': hourly_consumption,
-        'backup_hours': backup_hours
-    }
+    return BatteryRequirements(
+        backup_energy_kwh=backup_energy_kwh,
+        hourly_consumption=hourly_consumption,
+        backup_hours=backup_hours
+    )
 
 
 
@@ -45,7 +103,7 @@ def calculate_battery_specs(backup_energy_kwh, battery_type, depth_of_discharge=
         system_kw: System size in kW (to determine voltage)
     
     Returns:
-        dict with battery specifications including proper series/parallel configuration
+        BatterySpecs record including proper series/parallel configuration
     """
     # Default Depth of Discharge based on battery type
     if depth_of_discharge is None:
@@ -77,94 +135,35 @@ def calculate_battery_specs(backup_energy_kwh, battery_type, depth_of_discharge=
     
     # Different logic for Lithium vs Lead-Acid/Gel
     is_lithium = 'Lithium' in battery_type
+    # Larger lithium banks use kWh-based batteries (e.g., 5.12kWh Menred, 10.24kWh, etc.)
+    is_kwh_based = is_lithium and total_capacity_kwh >= 2.5
+    recommended_kwh_per_battery = 0
     
-    if is_lithium:
-        # Lithium batteries - can be kWh-based or Ah-based
-        # Check if we should use kWh-based lithium batteries (for larger systems)
-        if total_capacity_kwh >= 2.5:
-            # Use kWh-based lithium batteries (e.g., 5.12kWh Menred, 10.24kWh, etc.)
-            kwh_battery_sizes = [2.56, 5.12, 7.68, 10.24, 15.36, 20.48]  # Common kWh battery sizes
-            recommended_kwh_per_battery = min([s for s in kwh_battery_sizes if s >= total_capacity_kwh / batteries_in_series], 
-                                             default=kwh_battery_sizes[-1])
-            
-            # Calculate how many kWh batteries needed
-            parallel_strings = max(1, int(total_capacity_kwh / (recommended_kwh_per_battery * batteries_in_series)) + 
-                                  (1 if total_capacity_kwh % (recommended_kwh_per_battery * batteries_in_series) > 0 else 0))
-            total_batteries = batteries_in_series * parallel_strings
-            actual_total_kwh = recommended_kwh_per_battery * total_batteries
-            
-            # Convert to Ah for display (at system voltage)
-            recommended_ah = int((recommended_kwh_per_battery * 1000) / system_voltage)
-            battery_voltage_unit = system_voltage
-            
-            return {
-                'total_capacity_kwh': actual_total_kwh,
-                'usable_capacity_kwh': actual_total_kwh * dod,
-                'capacity_ah': recommended_ah,
-                'recommended_ah': recommended_ah,
-                'recommended_kwh': recommended_kwh_per_battery,
-                'system_voltage': system_voltage,
-                'battery_voltage_unit': battery_voltage_unit,
-                'batteries_in_series': batteries_in_series,
-                'parallel_strings': parallel_strings,
-                'total_batteries': total_batteries,
-                'depth_of_discharge': dod,
-                'battery_type': battery_type,
-                'configuration': f"{parallel_strings}P{batteries_in_series}S" if parallel_strings > 1 else f"{batteries_in_series}S",
-                'is_kwh_based': True
-            }
-        else:
-            # Small system - use Ah-based lithium (12V or 24V units)
-            # Lithium can come in 12V or 24V units
-            # Standard Ah sizes for lithium: 50, 100, 150, 200, 300Ah
-            standard_sizes_lithium = [50, 100, 150, 200, 300]
-            
-            # Calculate needed Ah at 12V base
-            capacity_ah = (total_capacity_kwh * 1000) / 12
-            recommended_ah = min([s for s in standard_sizes_lithium if s >= capacity_ah], default=300)
-            
-            # Calculate parallel strings
-            if recommended_ah < capacity_ah:
-                parallel_strings = int(capacity_ah / recommended_ah) + 1
-            else:
-                parallel_strings = 1
-            
-            total_batteries = batteries_in_series * parallel_strings
-            actual_total_kwh = (recommended_ah * 12 * parallel_strings) / 1000
-            
-            return {
-                'total_capacity_kwh': actual_total_kwh,
-                'usable_capacity_kwh': actual_total_kwh * dod,
-                'capacity_ah': capacity_ah,
-                'recommended_ah': recommended_ah,
-                'system_voltage': system_voltage,
-                'battery_voltage_unit': 12,  # Lithium Ah-based are typically 12V units
-                'batteries_in_series': batteries_in_series,
-                'parallel_strings': parallel_strings,
-                'total_batteries': total_batteries,
-                'depth_of_discharge': dod,
-                'battery_type': battery_type,
-                'configuration': f"{parallel_strings}P{batteries_in_series}S" if parallel_strings > 1 else f"{batteries_in_series}S",
-                'is_kwh_based': False
-            }
-    
-    else:
-        # Lead-Acid or Gel - ALWAYS 12V, max 200Ah
-        # Standard sizes: 50, 80, 100, 120, 150, 200Ah
-        standard_sizes_lead = [50, 80, 100, 120, 150, 200]
+    if is_kwh_based:
+        recommended_kwh_per_battery = _smallest_size_at_least(
+            KWH_BATTERY_SIZES, total_capacity_kwh / batteries_in_series
+        )
         
-        # Calculate needed Ah at 12V
-        capacity_ah = (total_capacity_kwh * 1000) / 12
+        # Calculate how many kWh batteries needed
+        string_kwh = recommended_kwh_per_battery * batteries_in_series
+        parallel_strings = max(1, int(total_capacity_kwh / string_kwh) + (1 if total_capacity_kwh % string_kwh > 0 else 0))
+        total_batteries = batteries_in_series * parallel_strings
+        actual_total_kwh = recommended_kwh_per_battery * total_batteries
         
-        # Find appropriate battery size (max 200Ah)
-        recommended_ah = min([s for s in standard_sizes_lead if s >= capacity_ah], default=200)
+        # Convert to Ah for display (at system voltage)
+        recommended_ah = int((recommended_kwh_per_battery * 1000) / system_voltage)
+        capacity_ah = recommended_ah
+        battery_voltage_unit = system_voltage
+    else:
+        # Ah-based 12V units: small lithium systems (LITHIUM_AH_SIZES: 50-300Ah)
+        # or Lead-Acid/Gel, which are ALWAYS 12V and max 200Ah (LEAD_AH_SIZES)
+        capacity_ah = (total_capacity_kwh * 1000) / 12
+        recommended_ah = _smallest_size_at_least(LITHIUM_AH_SIZES if is_lithium else LEAD_AH_SIZES, capacity_ah)
         
-        # If capacity needed exceeds what one 200Ah battery can provide per string,
-        # we need parallel strings
-        if capacity_ah > 200:
-            # Need multiple parallel strings
+        if not is_lithium and capacity_ah > 200:
+            # More than one 200Ah battery per string: parallel strings of the max size
             parallel_strings = int(capacity_ah / 200) + 1
-            recommended_ah = 200  # Use max size
+            recommended_ah = 200
         elif recommended_ah < capacity_ah:
             # Need multiple parallel strings with smaller batteries
             parallel_strings = int(capacity_ah / recommended_ah) + 1
@@ -173,24 +172,24 @@ def calculate_battery_specs(backup_energy_kwh, battery_type, depth_of_discharge=
         
         total_batteries = batteries_in_series * parallel_strings
         actual_total_kwh = (recommended_ah * 12 * parallel_strings) / 1000
-        
-        return {
-            'total_capacity_kwh': actual_total_kwh,
-            'usable_capacity_kwh': actual_total_kwh * dod,
-            'capacity_ah': capacity_ah,
-            'recommended_ah': recommended_ah,
-            'system_voltage': system_voltage,
-            'battery_voltage_unit': 12,  # Lead-Acid/Gel are ALWAYS 12V
-            'batteries_in_series': batteries_in_series,
-            'parallel_strings': parallel_strings,
-            'total_batteries': total_batteries,
-            'depth_of_discharge': dod,
-            'battery_type': battery_type,
-            'configuration': f"{parallel_strings}P{batteries_in_series}S" if parallel_strings > 1 else f"{batteries_in_series}S",
-            'is_kwh_based': False
-        }
-
-
+        battery_voltage_unit = 12
+    
+    return BatterySpecs(
+        total_capacity_kwh=actual_total_kwh,
+        usable_capacity_kwh=actual_total_kwh * dod,
+        capacity_ah=capacity_ah,
+        recommended_ah=recommended_ah,
+        recommended_kwh=recommended_kwh_per_battery,
+        system_voltage=system_voltage,
+        battery_voltage_unit=battery_voltage_unit,
+        batteries_in_series=batteries_in_series,
+        parallel_strings=parallel_strings,
+        total_batteries=total_batteries,
+        depth_of_discharge=dod,
+        battery_type=battery_type,
+        configuration=f"{parallel_strings}P{batteries_in_series}S" if parallel_strings > 1 else f"{batteries_in_series}S",
+        is_kwh_based=is_kwh_based
+    )
 
 
 def calculate_battery_cost(battery_specs, battery_type):
@@ -201,7 +200,7 @@ def calculate_battery_cost(battery_specs, battery_type):
     - Lithium: 40,000 - 60,000 KSh/kWh
     - Lead-Acid: 15,000 - 25,000 KSh/kWh
     """
-    capacity_kwh = battery_specs['total_capacity_kwh']
+    capacity_kwh = battery_specs.total_capacity_kwh
     
     if battery_type == 'Lithium':
         cost_per_kwh = 50000  # Mid-range
@@ -214,12 +213,12 @@ def calculate_battery_cost(battery_specs, battery_type):
     
     initial_cost = capacity_kwh * cost_per_kwh
     
-    return {
-        'initial_cost_ksh': initial_cost,
-        'cost_per_kwh': cost_per_kwh,
-        'cycle_life': cycle_life,
-        'warranty_years': warranty_years
-    }
+    return BatteryCost(
+        initial_cost_ksh=initial_cost,
+        cost_per_kwh=cost_per_kwh,
+        cycle_life=cycle_life,
+        warranty_years=warranty_years
+    )
 
 
 def calculate_lifecycle_cost(battery_cost_data, battery_specs, daily_cycles, years=25):
@@ -232,20 +231,21 @@ def calculate_lifecycle_cost(battery_cost_data, battery_specs, daily_cycles, yea
         daily_cycles: Average charge/discharge cycles per day
         years: Analysis period (default 25 years)
     """
-    cycle_life = battery_cost_data['cycle_life']
-    initial_cost = battery_cost_data['initial_cost_ksh']
+    cycle_life = battery_cost_data.cycle_life
+    initial_cost = battery_cost_data.initial_cost_ksh
     
     # Calculate number of replacements needed
     total_cycles = daily_cycles * 365 * years
     replacements_needed = int(total_cycles / cycle_life)
     
-    # Replacement costs (assume 10% price reduction per replacement)
-    total_replacement_cost = sum(
-        initial_cost * (0.9 ** i) for i in range(1, replacements_needed + 1)
+    # Replacement costs (assume 10% price reduction per replacement):
+    # closed form of sum(initial_cost * 0.9**i for i in 1..n)
+    total_replacement_cost = (
+        initial_cost * 0.9 * (1 - 0.9 ** replacements_needed) / 0.1 if replacements_needed else 0
     )
     
     # Maintenance costs (2% of battery cost per year for Lead-Acid, 0.5% for Lithium)
-    maintenance_rate = 0.005 if battery_specs['battery_type'] == 'Lithium' else 0.02
+    maintenance_rate = 0.005 if battery_specs.battery_type == 'Lithium' else 0.02
     annual_maintenance = initial_cost * maintenance_rate
     total_maintenance = annual_maintenance * years
     
@@ -253,18 +253,18 @@ def calculate_lifecycle_cost(battery_cost_data, battery_specs, daily_cycles, yea
     total_cost = initial_cost + total_replacement_cost + total_maintenance
     
     # Levelized cost (cost per kWh cycled)
-    total_kwh_cycled = battery_specs['usable_capacity_kwh'] * total_cycles
+    total_kwh_cycled = battery_specs.usable_capacity_kwh * total_cycles
     levelized_cost = total_cost / total_kwh_cycled if total_kwh_cycled > 0 else 0
     
-    return {
-        'initial_cost': initial_cost,
-        'replacements_needed': replacements_needed,
-        'replacement_cost': total_replacement_cost,
-        'maintenance_cost': total_maintenance,
-        'total_lifecycle_cost': total_cost,
-        'levelized_cost_per_kwh': levelized_cost,
-        'cost_per_year': total_cost / years
-    }
+    return LifecycleCost(
+        initial_cost=initial_cost,
+        replacements_needed=replacements_needed,
+        replacement_cost=total_replacement_cost,
+        maintenance_cost=total_maintenance,
+        total_lifecycle_cost=total_cost,
+        levelized_cost_per_kwh=levelized_cost,
+        cost_per_year=total_cost / years
+    )
 
 
 def compare_battery_types(backup_energy_kwh, daily_cycles=1, years=25):
@@ -289,8 +289,8 @@ def compare_battery_types(backup_energy_kwh, daily_cycles=1, years=25):
         }
     
     # Calculate savings
-    lithium_total = comparison['Lithium']['lifecycle']['total_lifecycle_cost']
-    lead_acid_total = comparison['Lead-Acid']['lifecycle']['total_lifecycle_cost']
+    lithium_total = comparison['Lithium']['lifecycle'].total_lifecycle_cost
+    lead_acid_total = comparison['Lead-Acid']['lifecycle'].total_lifecycle_cost
     
     comparison['savings_with_lithium'] = lead_acid_total - lithium_total
     comparison['roi_better'] = 'Lithium' if lithium_total < lead_acid_total else 'Lead-Acid'
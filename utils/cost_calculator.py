@@ -1,21 +1,117 @@
 import json
+import math
 import os
+import numpy as np
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _freeze(obj):
+    """Recursively convert dicts/lists to read-only MappingProxyType/tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+@lru_cache(maxsize=None)
+def _load_frozen(path):
+    """Parse and freeze a JSON file; raises on failure so errors are never cached"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return _freeze(orjson.loads(f.read()))
+    with open(path, 'r', encoding='utf-8') as f:
+        return _freeze(json.load(f))
 
 def load_json_data(filename):
-    """Loads JSON data from the data directory."""
+    """
+    Loads JSON data from the data directory.
+    
+    Returns the data exactly as stored (no date or type coercion), or None if
+    the file is missing or invalid. Parsed with orjson when it is installed,
+    otherwise the stdlib json module. Each file is read once per process and
+    the same object is handed to every caller, so it is frozen: dicts become
+    read-only MappingProxyType and lists become tuples. Failures are not
+    cached, so a file that is added or fixed later is picked up on the next call.
+    """
     # Use absolute path based on script location
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     path = os.path.join(script_dir, "data", filename)
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _load_frozen(path)
     except FileNotFoundError:
         print(f"Error: Data file not found at {path}")
         return None
-    except json.JSONDecodeError as e:
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses this
         print(f"Error: Invalid JSON in {path}: {e}")
         return None
 
+# id(tariff data) -> (tariff data, compiled schedule) for the frozen
+# load_json_data payloads; see _tariff_schedule
+_TARIFF_SCHEDULES = {}
+
+def _build_tariff_schedule(tariff_data):
+    """
+    Domestic tiers resolved into a piecewise-linear schedule.
+    
+    Returns (names, start_kwh, upper_kwh, base_kwh, base_cost, rates,
+    surcharge_per_kwh). Consumption of at least start_kwh[k] falls in tier k,
+    which bills the kWh above base_kwh[k] up to upper_kwh[k] at rates[k];
+    base_cost[k] is the cost of the first base_kwh[k] kWh. Costs and rates
+    include VAT, and surcharge_per_kwh is the VAT-inclusive pass-through
+    charge billed on every kWh. The
+    band widths are the tier caps (Lifeline up to its max, Ordinary 1 the 70 kWh
+    above Lifeline, Ordinary 2 unbounded), laid end to end. A tier only starts
+    once consumption reaches its published minimum and exceeds the bands
+    below it, so fractional consumption between two published ranges (e.g.
+    30.5 kWh) stays in the lower tier, with the part above its cap unbilled,
+    exactly as the tier-by-tier walk prices it.
+    """
+    names, start_kwh, upper_kwh, base_kwh, base_cost, rates = [], [], [], [], [], []
+    vat_multiplier = 1 + tariff_data.get("vat_rate", 0.16)
+    edge = cost = 0.0
+    for tier in tariff_data.get("tariffs", {}).get("domestic", []):
+        tier_name = tier["name"]
+        min_kwh, max_kwh = tier["range_kwh"]
+        if tier_name == "Lifeline":
+            cap_kwh = max_kwh
+        elif tier_name == "Ordinary 1":
+            cap_kwh = max_kwh - 30
+        elif tier_name == "Ordinary 2":
+            cap_kwh = math.inf
+        else:
+            cap_kwh = max_kwh - min_kwh + 1
+        rate = tier["base_rate_ksh_per_kwh"] * vat_multiplier
+        names.append(tier_name)
+        # Smallest consumption that is both >= min_kwh and > edge
+        start_kwh.append(min_kwh if min_kwh > edge else math.nextafter(edge, math.inf))
+        base_kwh.append(edge)
+        base_cost.append(cost)
+        rates.append(rate)
+        edge += cap_kwh
+        cost += cap_kwh * rate
+        upper_kwh.append(edge)
+    return (
+        tuple(names), tuple(start_kwh), tuple(upper_kwh), tuple(base_kwh), tuple(base_cost),
+        tuple(rates), tariff_data.get("pass_through_charges_ksh_per_kwh", 5.5) * vat_multiplier
+    )
+
+def _tariff_schedule(tariff_data):
+    """_build_tariff_schedule, memoized for read-only tariff payloads"""
+    # Plain dicts can be edited in place, so they are rebuilt on every call
+    if not isinstance(tariff_data, MappingProxyType):
+        return _build_tariff_schedule(tariff_data)
+    entry = _TARIFF_SCHEDULES.get(id(tariff_data))
+    if entry is None or entry[0] is not tariff_data:
+        entry = (tariff_data, _build_tariff_schedule(tariff_data))
+        _TARIFF_SCHEDULES[id(tariff_data)] = entry
+    return entry[1]
+
 def calculate_tariff_cost(monthly_consumption_kwh, tariff_data):
     """
     Calculates the monthly electricity cost and effective rate based on EPRA tariffs.
@@ -24,59 +120,90 @@ def calculate_tariff_cost(monthly_consumption_kwh, tariff_data):
     if not tariff_data:
         return 0.0, 0.0, "N/A"
 
-    tariffs = tariff_data.get("tariffs", {}).get("domestic", [])
-    pass_through_charge = tariff_data.get("pass_through_charges_ksh_per_kwh", 5.5)
-    vat_rate = tariff_data.get("vat_rate", 0.16)
-
-    total_base_cost = 0.0
-    remaining_consumption = monthly_consumption_kwh
-    tariff_category = "Unknown"
+    names, start_kwh, upper_kwh, base_kwh, base_cost, rates, surcharge_per_kwh = _tariff_schedule(tariff_data)
 
-    # Calculate base cost based on tiered structure
-    for tier in tariffs:
-        tier_name = tier["name"]
-        min_kwh, max_kwh = tier["range_kwh"]
-        rate = tier["base_rate_ksh_per_kwh"]
-
-        if monthly_consumption_kwh >= min_kwh:
-            if remaining_consumption > 0:
-                consumption_in_tier = min(remaining_consumption, max_kwh - min_kwh + 1)
-                
-                # Special handling for the first tier (Lifeline)
-                if tier_name == "Lifeline":
-                    consumption_in_tier = min(monthly_consumption_kwh, max_kwh)
-                    
-                # For subsequent tiers, calculate consumption in that tier
-                elif tier_name == "Ordinary 1":
-                    consumption_in_tier = min(remaining_consumption, max_kwh - 30)
-                
-                elif tier_name == "Ordinary 2":
-                    consumption_in_tier = remaining_consumption
-                
-                
-                cost_in_tier = consumption_in_tier * rate
-                total_base_cost += cost_in_tier
-                remaining_consumption -= consumption_in_tier
-                tariff_category = tier_name
-                
-                if remaining_consumption <= 0:
-                    break
-    
-    # Simple approximation for pass-through charges and VAT
-    total_pass_through_cost = monthly_consumption_kwh * pass_through_charge
-    
-    # Total cost before VAT (simplified: base + pass-through)
-    subtotal = total_base_cost + total_pass_through_cost
-    
-    # VAT on subtotal
-    total_vat = subtotal * vat_rate
-    
-    total_monthly_cost = subtotal + total_vat
+    # Base cost from the tier the consumption falls in (no tier for zero usage)
+    k = bisect_right(start_kwh, monthly_consumption_kwh) - 1
+    if k >= 0:
+        total_base_cost = base_cost[k] + (min(monthly_consumption_kwh, upper_kwh[k]) - base_kwh[k]) * rates[k]
+        tariff_category = names[k]
+    else:
+        total_base_cost = 0.0
+        tariff_category = "Unknown"
+    
+    # Simple approximation for pass-through charges (VAT is already folded into
+    # the schedule's rates and surcharge)
+    total_monthly_cost = total_base_cost + monthly_consumption_kwh * surcharge_per_kwh
     
     effective_rate = total_monthly_cost / monthly_consumption_kwh if monthly_consumption_kwh > 0 else 0.0
 
     return total_monthly_cost, effective_rate, tariff_category
 
+def calculate_tariff_cost_batch(monthly_consumptions_kwh, tariff_data):
+    """
+    Vectorized calculate_tariff_cost over an array of monthly consumptions.
+    
+    Looks up every consumption's tier in the same piecewise schedule as the
+    scalar version with one searchsorted call.
+    Returns (total_monthly_costs, effective_rates, tariff_categories) arrays.
+    """
+    kwh = np.asarray(monthly_consumptions_kwh, dtype=np.float64)
+    if not tariff_data:
+        return np.zeros_like(kwh), np.zeros_like(kwh), np.full(kwh.shape, "N/A", dtype=object)
+
+    names, start_kwh, upper_kwh, base_kwh, base_cost, rates, surcharge_per_kwh = _tariff_schedule(tariff_data)
+
+    billed = kwh > 0
+    if names:
+        k = np.searchsorted(start_kwh, kwh, side="right") - 1
+        in_tier = k >= 0
+        t = np.maximum(k, 0)
+        total_base_cost = np.where(
+            in_tier,
+            np.take(base_cost, t) + (np.minimum(kwh, np.take(upper_kwh, t)) - np.take(base_kwh, t)) * np.take(rates, t),
+            0.0
+        )
+        tariff_category = np.array(names + ("Unknown",), dtype=object)[np.where(in_tier, k, len(names))]
+    else:
+        total_base_cost = np.zeros_like(kwh)
+        tariff_category = np.full(kwh.shape, "Unknown", dtype=object)
+
+    total_monthly_cost = total_base_cost + kwh * surcharge_per_kwh
+
+    effective_rate = np.divide(
+        total_monthly_cost, kwh, out=np.zeros_like(kwh), where=billed
+    )
+
+    return total_monthly_cost, effective_rate, tariff_category
+
+# id(inverter tuple) -> (tuple, capacities, inverters), both sorted by capacity,
+# for the frozen load_json_data catalogs; see _inverter_index
+_INVERTER_INDEX = {}
+
+def _build_inverter_index(inverters):
+    """Catalog inverters sorted by capacity, plus the matching capacity list for bisect"""
+    rated = sorted(
+        (inv for inv in inverters if "capacity_kw" in inv),
+        key=lambda inv: inv["capacity_kw"]
+    )
+    return tuple(inv["capacity_kw"] for inv in rated), tuple(rated)
+
+def _inverter_index(inverters):
+    """
+    _build_inverter_index, memoized for read-only catalogs.
+    
+    load_json_data hands out the same frozen catalog every time, with its
+    inverter list as a tuple; plain lists can be edited in place, so they are
+    re-sorted on every call. The stored tuple guards against id reuse.
+    """
+    if not isinstance(inverters, tuple):
+        return _build_inverter_index(inverters)
+    entry = _INVERTER_INDEX.get(id(inverters))
+    if entry is None or entry[0] is not inverters:
+        entry = (inverters, *_build_inverter_index(inverters))
+        _INVERTER_INDEX[id(inverters)] = entry
+    return entry[1], entry[2]
+
 def calculate_system_cost(system_size_kw, equipment_catalog, assumptions):
     """
     Estimates the total upfront cost of a solar system with proper breakdown.
@@ -101,7 +228,6 @@ def calculate_system_cost(system_size_kw, equipment_catalog, assumptions):
     standard_wattage = 450  # Using standard 450W panels
     
     # Calculate number of panels
-    import math
     num_panels = max(1, math.ceil(system_size_watts / standard_wattage))
     
     # Recalculate actual system size
@@ -113,9 +239,11 @@ def calculate_system_cost(system_size_kw, equipment_catalog, assumptions):
     
     # 2. Inverter Cost Calculation
     # Inverters come in standard sizes: 1.5kW, 3kW, 5kW, 8kW, 10kW
-    suitable_inverters = [inv for inv in inverters if inv.get("capacity_kw", 0) >= system_size_kw]
-    if suitable_inverters:
-        chosen_inverter = min(suitable_inverters, key=lambda x: x.get("capacity_kw", 999))
+    capacities, sorted_inverters = _inverter_index(inverters)
+    i = bisect_left(capacities, system_size_kw)
+    if i < len(capacities):
+        # Smallest inverter that covers the system (catalog order breaks ties)
+        chosen_inverter = sorted_inverters[i]
         inverter_base_cost = chosen_inverter.get("price_ksh", system_size_kw * 25000)
         inverter_capacity = chosen_inverter.get("capacity_kw", system_size_kw)
     else:
@@ -202,6 +330,64 @@ def calculate_system_cost(system_size_kw, equipment_catalog, assumptions):
     
     return total_cost, cost_per_watt, breakdown
 
+def calculate_system_cost_batch(system_sizes_kw, equipment_catalog, assumptions):
+    """
+    Vectorized calculate_system_cost over an array of system sizes.
+    
+    Same pricing rules as the scalar version, evaluated for every candidate
+    size at once (e.g. for sizing sweeps). Returns (total_costs,
+    costs_per_watt, breakdown) where breakdown is a flat dict of arrays.
+    """
+    sizes_kw = np.asarray(system_sizes_kw, dtype=np.float64)
+    if not equipment_catalog or not assumptions:
+        return np.zeros_like(sizes_kw), np.zeros_like(sizes_kw), {}
+
+    # 1. Panels: 450W panels at 35 KSh/Watt
+    num_panels = np.maximum(1, np.ceil(sizes_kw * 1000 / 450)).astype(np.int64)
+    actual_system_watts = num_panels * 450
+    actual_system_kw = actual_system_watts / 1000
+    panel_base_cost = actual_system_watts * 35
+
+    # 2. Inverter: smallest catalog inverter that covers the size, else KSh 25,000/kW
+    capacities, sorted_inverters = _inverter_index(equipment_catalog.get("inverters", []))
+    i = np.searchsorted(np.asarray(capacities, dtype=np.float64), sizes_kw, side="left")
+    in_catalog = i < len(capacities)
+    prices = np.array([inv.get("price_ksh", np.nan) for inv in sorted_inverters] + [np.nan])
+    inverter_base_cost = prices[i]
+    inverter_base_cost = np.where(np.isnan(inverter_base_cost), sizes_kw * 25000, inverter_base_cost)
+    fallback_capacity = np.select(
+        [sizes_kw <= 1.5, sizes_kw <= 3.0, sizes_kw <= 5.0], [1.5, 3.0, 5.0], np.ceil(sizes_kw)
+    )
+    inverter_capacity = np.where(
+        in_catalog, np.array(capacities + (np.nan,), dtype=np.float64)[i], fallback_capacity
+    )
+
+    # 3-5. VAT, mounting, safety, installation and BOS as in calculate_system_cost
+    equipment_base_total = panel_base_cost + inverter_base_cost
+    vat_amount = equipment_base_total * 0.16
+    mounting_cost = num_panels * 3000
+    safety_cost = np.full_like(sizes_kw, 3500 + 6000 + 4500)
+    electrical_labor = 5000 + (actual_system_kw * 2000)
+    bos_cost = equipment_base_total * 0.08
+
+    total_cost = equipment_base_total + vat_amount + mounting_cost + electrical_labor + bos_cost + safety_cost
+    cost_per_watt = total_cost / actual_system_watts
+
+    breakdown = {
+        'panel_count': num_panels,
+        'panel_cost': panel_base_cost,
+        'inverter_capacity_kw': inverter_capacity,
+        'inverter_cost': inverter_base_cost,
+        'vat': vat_amount,
+        'mounting': mounting_cost,
+        'safety': safety_cost,
+        'installation': electrical_labor,
+        'bos': bos_cost,
+        'actual_system_kw': actual_system_kw
+    }
+
+    return total_cost, cost_per_watt, breakdown
+
 if __name__ == '__main__':
     # Example usage for testing
     tariff_data = load_json_data("epra_tariffs_2024_2026.json")
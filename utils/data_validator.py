@@ -1,63 +1,133 @@
-import json
-
-def load_json_data(filename):
-    """Loads JSON data from the data directory."""
-    path = f"data/{filename}"
-    try:
-        with open(path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return None
-
-def validate_recommendation(recommendation, equipment_catalog, assumptions):
-    """Validates the Gemini model's recommendation against technical, price, and physics rules."""
+import os
+import sys
+import numpy as np
+
+if __name__ == '__main__':
+    # Run directly (python utils/data_validator.py): make the project root importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Shared loader: parsed once per process and frozen, so repeated validations don't re-read the catalog
+from utils.cost_calculator import load_json_data
+
+_DAYS_PER_YEAR = 365
+
+def _generation_coefficient(assumptions):
+    """Max annual kWh per kW of panels per kWh/m²/day of GHI: 365 * (1 - losses)"""
+    return _DAYS_PER_YEAR * (1 - assumptions.get("system_losses_percent", 0.15))
+
+# validate_many failure bits, one per validate_recommendation check
+SIZE_MISMATCH = 1
+INVERTER_RATIO = 2
+COST_PER_WATT = 4
+GENERATION_LIMIT = 8
+MISSING_INPUT = 16
+
+def _recommendation_fields(recommendation):
+    """
+    The scalars the checks use, read from the recommendation in one pass:
+    (panel_count, panel_wattage, system_size_kw, inverter_size_kw,
+    cost_per_watt, ghi, annual_gen). Missing or null sections count as empty.
+    """
+    sys_sizing = recommendation.get("system_sizing") or {}
+    return (
+        sys_sizing.get("panel_count", 0),
+        sys_sizing.get("panel_wattage_w", 0),
+        sys_sizing.get("required_system_size_kw", 0),
+        sys_sizing.get("inverter_size_kw", 0),
+        (recommendation.get("financial_analysis") or {}).get("cost_per_watt_ksh", 0),
+        (recommendation.get("location_analysis") or {}).get("ghi_kwh_m2_day", 0),
+        sys_sizing.get("target_annual_generation_kwh", 0),
+    )
+
+def validate_recommendation(recommendation, equipment_catalog, assumptions, fail_fast=False):
+    """
+    Validates the Gemini model's recommendation against technical, price, and physics rules.
+    With fail_fast=True, returns as soon as one check fails (e.g. in retry loops).
+    """
     errors = []
     if not recommendation or not equipment_catalog or not assumptions:
         errors.append("Missing recommendation, catalog, or assumptions for validation.")
         return errors
 
-    # Technical Validation
-    sys_sizing = recommendation.get("system_sizing", {})
-    panel_count = sys_sizing.get("panel_count", 0)
-    panel_wattage = sys_sizing.get("panel_wattage_w", 0)
-    system_size_kw = sys_sizing.get("required_system_size_kw", 0)
-    inverter_size_kw = sys_sizing.get("inverter_size_kw", 0)
+    (panel_count, panel_wattage, system_size_kw, inverter_size_kw,
+     cost_per_watt, ghi, annual_gen) = _recommendation_fields(recommendation)
 
+    # Technical Validation
     # 1. Panel count * wattage matches system size (±5%)
     if panel_count > 0 and panel_wattage > 0:
         calculated_size_kw = (panel_count * panel_wattage) / 1000
         if not (0.95 * calculated_size_kw <= system_size_kw <= 1.05 * calculated_size_kw):
             errors.append(f"Technical Error: System size mismatch. Calculated: {calculated_size_kw:.2f} kW, Recommended: {system_size_kw:.2f} kW")
+            if fail_fast:
+                return errors
 
     # 2. Inverter capacity = 1.1-1.3x panel capacity
     if system_size_kw > 0 and inverter_size_kw > 0:
         if not (1.1 * system_size_kw <= inverter_size_kw <= 1.3 * system_size_kw):
             errors.append(f"Technical Error: Inverter size is not 1.1-1.3x the system size. System: {system_size_kw:.2f} kW, Inverter: {inverter_size_kw:.2f} kW")
+            if fail_fast:
+                return errors
 
     # Price Validation
-    fin_analysis = recommendation.get("financial_analysis", {})
-    cost_per_watt = fin_analysis.get("cost_per_watt_ksh", 0)
     min_cost_per_watt, max_cost_per_watt = assumptions.get("installation_cost_ksh_per_watt_range", [55, 120])
 
     # 3. Cost per watt is within Kenya market ranges
     if cost_per_watt > 0 and not (min_cost_per_watt <= cost_per_watt <= max_cost_per_watt):
         errors.append(f"Price Error: Cost per watt ({cost_per_watt:.2f} KSh) is outside the expected range of {min_cost_per_watt}-{max_cost_per_watt} KSh.")
+        if fail_fast:
+            return errors
 
     # Physics Validation
-    loc_analysis = recommendation.get("location_analysis", {})
-    ghi = loc_analysis.get("ghi_kwh_m2_day", 0)
-    annual_gen = sys_sizing.get("target_annual_generation_kwh", 0)
-    system_losses = assumptions.get("system_losses_percent", 0.15)
+    gen_coef = _generation_coefficient(assumptions)
 
     # 4. Annual generation is physically possible
     if ghi > 0 and system_size_kw > 0 and annual_gen > 0:
         # Max possible generation (kW * GHI * 365 * (1 - losses))
-        max_possible_gen = system_size_kw * ghi * 365 * (1 - system_losses)
+        max_possible_gen = system_size_kw * ghi * gen_coef
         if annual_gen > max_possible_gen * 1.05: # Allow 5% margin
             errors.append(f"Physics Error: Annual generation ({annual_gen:.2f} kWh) exceeds theoretical maximum ({max_possible_gen:.2f} kWh).")
 
     return errors
 
+def validate_many(recommendations, equipment_catalog, assumptions):
+    """
+    Vectorized validate_recommendation for many recommendations (e.g. N-best reranking).
+    
+    Applies the same four checks to all records at once and returns a uint8
+    array of failure bits per record (SIZE_MISMATCH, INVERTER_RATIO,
+    COST_PER_WATT, GENERATION_LIMIT, or MISSING_INPUT); 0 means it passed.
+    """
+    if not equipment_catalog or not assumptions:
+        return np.full(len(recommendations), MISSING_INPUT, dtype=np.uint8)
+
+    fields = [_recommendation_fields(recommendation or {}) for recommendation in recommendations]
+    panel_count, panel_wattage, system_size_kw, inverter_size_kw, cost_per_watt, ghi, annual_gen = (
+        np.array(fields, dtype=np.float64).reshape(-1, 7).T
+    )
+    min_cost_per_watt, max_cost_per_watt = assumptions.get("installation_cost_ksh_per_watt_range", [55, 120])
+    gen_coef = _generation_coefficient(assumptions)
+
+    failed = np.zeros(len(fields), dtype=np.uint8)
+    failed[[not recommendation for recommendation in recommendations]] |= MISSING_INPUT
+
+    calculated_size_kw = (panel_count * panel_wattage) / 1000
+    failed[(panel_count > 0) & (panel_wattage > 0) & ~(
+        (0.95 * calculated_size_kw <= system_size_kw) & (system_size_kw <= 1.05 * calculated_size_kw)
+    )] |= SIZE_MISMATCH
+
+    failed[(system_size_kw > 0) & (inverter_size_kw > 0) & ~(
+        (1.1 * system_size_kw <= inverter_size_kw) & (inverter_size_kw <= 1.3 * system_size_kw)
+    )] |= INVERTER_RATIO
+
+    failed[(cost_per_watt > 0) & ~(
+        (min_cost_per_watt <= cost_per_watt) & (cost_per_watt <= max_cost_per_watt)
+    )] |= COST_PER_WATT
+
+    max_possible_gen = system_size_kw * ghi * gen_coef
+    failed[(ghi > 0) & (system_size_kw > 0) & (annual_gen > max_possible_gen * 1.05)] |= GENERATION_LIMIT
+
+    return failed
+
 if __name__ == '__main__':
     # Example usage for testing
     mock_recommendation = {
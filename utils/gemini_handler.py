@@ -1,12 +1,139 @@
 import os
 import json
+import string
+import sys
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from google.api_core import exceptions
-import sys
-sys.path.append('.')
-from prompts.system_prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+
+if __name__ == '__main__':
+    # Run directly (python utils/gemini_handler.py): make the project root importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts.system_prompts import SYSTEM_PROMPT, INPUT_DATA_TEMPLATE, USER_PROMPT_TEMPLATE
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Load .env once; the key itself is still read on every call
+try:
+    load_dotenv()
+except Exception:
+    pass
+
+# Configure the model for JSON output
+_GENERATION_CONFIG = GenerationConfig(
+    temperature=0.1,
+    response_mime_type="application/json"
+)
+
+# id(payload) -> (payload, serialized JSON) for the frozen load_json_data payloads
+_JSON_CACHE = {}
+
+# id(assumptions) -> (assumptions, _AssumptionView); see _assumption_view
+_ASSUMPTION_VIEWS = {}
+
+
+@dataclass(frozen=True)
+class _AssumptionView:
+    """The baseline assumptions quoted in the system prompt, with their defaults applied"""
+    system_losses_percent: float
+    degradation_rate_per_year: float
+    installation_cost_ksh_per_watt: float
+    grid_emission_factor_tco2_per_mwh: float
+
+    @classmethod
+    def from_assumptions(cls, assumptions):
+        return cls(
+            system_losses_percent=assumptions.get("system_losses_percent", 0.15),
+            degradation_rate_per_year=assumptions.get("degradation_rate_per_year", 0.008),
+            installation_cost_ksh_per_watt=sum(assumptions.get("installation_cost_ksh_per_watt_range", [55, 120])) / 2,
+            grid_emission_factor_tco2_per_mwh=assumptions.get("grid_emission_factor_tco2_per_mwh", 0.4087)
+        )
+
+
+def _assumption_view(assumptions):
+    """_AssumptionView, built once per read-only assumptions payload"""
+    if not isinstance(assumptions, MappingProxyType):
+        return _AssumptionView.from_assumptions(assumptions)
+    entry = _ASSUMPTION_VIEWS.get(id(assumptions))
+    if entry is None or entry[0] is not assumptions:
+        entry = (assumptions, _AssumptionView.from_assumptions(assumptions))
+        _ASSUMPTION_VIEWS[id(assumptions)] = entry
+    return entry[1]
+
+
+def _compile_template(template):
+    """Split a str.format template once into (literal, field, format spec) parts"""
+    return tuple((literal, field, spec) for literal, field, spec, _ in string.Formatter().parse(template))
+
+
+def _fill(parts, **values):
+    """Equivalent of template.format(**values) for a template split by _compile_template"""
+    return "".join(
+        literal + (format(values[field], spec) if field is not None else "")
+        for literal, field, spec in parts
+    )
+
+
+# The system prompt has no per-request fields, so one model serves every request
+_SYSTEM_INSTRUCTION = _fill(_compile_template(SYSTEM_PROMPT))
+_INPUT_DATA_PARTS = _compile_template(INPUT_DATA_TEMPLATE)
+_USER_PROMPT_PARTS = _compile_template(USER_PROMPT_TEMPLATE)
+
+
+def _dumps(obj):
+    """Pretty-printed JSON for the prompts; orjson when installed, stdlib json otherwise"""
+    # default=dict serializes the read-only MappingProxyType payloads from load_json_data
+    if orjson is not None:
+        return orjson.dumps(obj, default=dict, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2, default=dict)
+
+
+def _cached_dumps(obj):
+    """_dumps, memoized for read-only payloads (the catalog, tariffs and assumptions rarely change)"""
+    if not isinstance(obj, MappingProxyType):
+        return _dumps(obj)
+    entry = _JSON_CACHE.get(id(obj))
+    if entry is None or entry[0] is not obj:
+        entry = (obj, _dumps(obj))
+        _JSON_CACHE[id(obj)] = entry
+    return entry[1]
+
+
+# The API key genai is currently configured with; see _configure
+_configured_key = None
+_configure_lock = threading.Lock()
+
+
+def _configure(api_key):
+    """Point the process-wide genai client at api_key, only when the key changes"""
+    global _configured_key
+    with _configure_lock:
+        if api_key != _configured_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+@lru_cache(maxsize=8)
+def _gemini_model(api_key, model_name):
+    """
+    Gemini model reused across requests for one key and model name.
+    
+    A model binds the configured client on its first call, so run
+    _configure(api_key) before using it.
+    """
+    return genai.GenerativeModel(
+        model_name=model_name,
+        system_instruction=_SYSTEM_INSTRUCTION
+    )
 
 
 def generate_solar_recommendation(
@@ -19,33 +146,36 @@ def generate_solar_recommendation(
     """
     Generates a solar system recommendation using Google Gemini.
     """
-    # 1. Format the System Prompt with dynamic data
-    system_prompt_formatted = SYSTEM_PROMPT.format(
+    # 1. Format the request's input data (the system prompt itself is fixed)
+    assumptions = _assumption_view(baseline_assumptions)
+    input_data_formatted = _fill(
+        _INPUT_DATA_PARTS,
         location=location,
         ghi_kwh_m2_day=ghi_kwh_m2_day,
         monthly_consumption_kwh=monthly_consumption_kwh,
         system_preference=system_preference,
         tariff_category=tariff_category,
         effective_rate_ksh_per_kwh=effective_rate_ksh_per_kwh,
-        system_losses_percent=baseline_assumptions.get("system_losses_percent", 0.15),
-        degradation_rate_per_year=baseline_assumptions.get("degradation_rate_per_year", 0.008),
-        installation_cost_ksh_per_watt=sum(baseline_assumptions.get("installation_cost_ksh_per_watt_range", [55, 120])) / 2,
-        grid_emission_factor_tco2_per_mwh=baseline_assumptions.get("grid_emission_factor_tco2_per_mwh", 0.4087)
+        system_losses_percent=assumptions.system_losses_percent,
+        degradation_rate_per_year=assumptions.degradation_rate_per_year,
+        installation_cost_ksh_per_watt=assumptions.installation_cost_ksh_per_watt,
+        grid_emission_factor_tco2_per_mwh=assumptions.grid_emission_factor_tco2_per_mwh
     )
 
     # 2. Format the User Prompt with all data for the model to use
-    user_prompt_formatted = USER_PROMPT_TEMPLATE.format(
+    user_prompt_formatted = _fill(
+        _USER_PROMPT_PARTS,
         location=location,
         monthly_consumption_kwh=monthly_consumption_kwh,
         system_preference=system_preference,
-        equipment_catalog=json.dumps(equipment_catalog, indent=2),
-        tariff_data=json.dumps(tariff_data, indent=2),
-        baseline_assumptions=json.dumps(baseline_assumptions, indent=2)
+        equipment_catalog=_cached_dumps(equipment_catalog),
+        tariff_data=_cached_dumps(tariff_data),
+        baseline_assumptions=_cached_dumps(baseline_assumptions)
     )
     
     # CRITICAL: If an existing configuration is provided, force the AI to use it
     if existing_system_config:
-        config_str = json.dumps(existing_system_config, indent=2)
+        config_str = _dumps(existing_system_config)
         user_prompt_formatted += f"""
         
         CRITICAL INSTRUCTION:
@@ -62,48 +192,33 @@ def generate_solar_recommendation(
         - Use the exact panel count and battery details provided.
         """
 
-    # Load .env and get Gemini API key
-    try:
-        load_dotenv()
-    except Exception:
-        pass
-
+    # Get Gemini API key
     api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         return None, "❌ Gemini API key not found. Add GEMINI_API_KEY to your .env file. Get a free key at: https://aistudio.google.com/app/apikey"
     
-    # Configure the client to use the provided API key
+    # 3. Configure the client to use the provided API key
     try:
-        genai.configure(api_key=api_key)
+        _configure(api_key)
+        model = _gemini_model(api_key, model_name)
     except Exception as e:
         return None, f"Error configuring Gemini client: {e}"
 
-    # 3. Configure the model for JSON output
-    generation_config = GenerationConfig(
-        temperature=0.1,
-        response_mime_type="application/json"
-    )
-
     # 4. Call the Gemini API
     try:
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            system_instruction=system_prompt_formatted
-        )
-        
         response = model.generate_content(
-            contents=user_prompt_formatted,
-            generation_config=generation_config
+            contents=input_data_formatted + user_prompt_formatted,
+            generation_config=_GENERATION_CONFIG
         )
         
         # The response.text should be a valid JSON string due to the config
-        return json.loads(response.text), None
+        return (orjson or json).loads(response.text), None
 
     except exceptions.GoogleAPICallError as e:
         error_message = f"Gemini API Error: {e}"
         print(error_message)
         return None, error_message
-    except json.JSONDecodeError as e:
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses this
         error_message = f"JSON Decode Error: {e}. Raw response: {response.text}"
         print(error_message)
         return None, error_message
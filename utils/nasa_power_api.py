@@ -1,12 +1,40 @@
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import lru_cache
 from geopy.geocoders import Nominatim
 
-# Convert address to coordinates
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parameters fetched by fetch_by_address when none are given, and their
+# comma-joined query value (built once)
+_DEFAULT_PARAMETERS = (
+    'ALLSKY_SFC_SW_DWN', 'CLRSKY_SFC_SW_DWN', 'ALLSKY_KT',
+    'T2M', 'RH2M', 'T2M_MAX', 'T2M_MIN', 'WS10M'
+)
+_DEFAULT_PARAMETERS_QUERY = ",".join(_DEFAULT_PARAMETERS)
+
+# Shared clients so repeat calls reuse keep-alive connections instead of
+# paying a TCP+TLS handshake each time (geopy's default RequestsAdapter
+# holds its own session per geocoder instance)
+@lru_cache(maxsize=None)
+def _http_session():
+    session = requests.Session()
+    session.headers["User-Agent"] = "jua-smart/2.1"
+    return session
+
+@lru_cache(maxsize=None)
+def _geocoder():
+    return Nominatim(user_agent="nasa_power_api")
+
+# Convert address to coordinates (memoized: Nominatim's usage policy asks
+# clients not to repeat identical queries; misses raise and are not cached)
+@lru_cache(maxsize=512)
 def address_to_coordinates(address):
-    geolocator = Nominatim(user_agent="nasa_power_api")
-    location = geolocator.geocode(address)
+    location = _geocoder().geocode(address)
     if location:
         return location.latitude, location.longitude
     else:
@@ -16,7 +44,7 @@ def address_to_coordinates(address):
 def fetch_nasa_power_data(lat, lon, start_date, end_date, parameters):
     base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
     params = {
-        "parameters": ",".join(parameters),
+        "parameters": _DEFAULT_PARAMETERS_QUERY if parameters is _DEFAULT_PARAMETERS else ",".join(parameters),
         "community": "RE",
         "latitude": lat,
         "longitude": lon,
@@ -25,15 +53,16 @@ def fetch_nasa_power_data(lat, lon, start_date, end_date, parameters):
         "format": "JSON"
     }
 
-    response = requests.get(base_url, params=params)
+    response = _http_session().get(base_url, params=params, timeout=30)
     response.raise_for_status()
-    data = response.json()
+    data = orjson.loads(response.content) if orjson is not None else response.json()
 
     if 'properties' in data and 'parameter' in data['properties']:
         df = pd.DataFrame(data['properties']['parameter'])
-        df.index = pd.to_datetime(df.index)
-        df = df.reset_index().rename(columns={"index": "Date"})
-        return df
+        # Keys are YYYYMMDD strings; an explicit format skips per-value inference
+        df.index = pd.to_datetime(df.index, format="%Y%m%d")
+        df.index.name = "Date"
+        return df.reset_index()
     else:
         raise ValueError("No data found for the given parameters")
 
@@ -52,10 +81,7 @@ def fetch_by_address(address, start_date=None, end_date=None, parameters=None):
 
     # Default parameters
     if parameters is None:
-        parameters = [
-            'ALLSKY_SFC_SW_DWN', 'CLRSKY_SFC_SW_DWN', 'ALLSKY_KT',
-            'T2M', 'RH2M', 'T2M_MAX', 'T2M_MIN', 'WS10M'
-        ]
+        parameters = _DEFAULT_PARAMETERS
 
     lat, lon = address_to_coordinates(address)
     return fetch_nasa_power_data(lat, lon, start_date, end_date, parameters)
\ No newline at end of file
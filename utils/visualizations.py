@@ -1,34 +1,34 @@
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
 import numpy as np
 
 def create_financial_timeline(upfront_cost, annual_savings, payback_period, npv_25yr, inverter_replacement_cost):
     """Creates a Plotly line chart for cumulative savings over 25 years."""
     years = np.arange(0, 26)
-    cumulative_savings = np.zeros(26)
     
     # Simple model: constant annual savings, one inverter replacement
-    for i in range(1, 26):
-        savings = annual_savings
-        # Inverter replacement at year 10 (cost incurred at the start of year 10)
-        if i == 10:
-            savings -= inverter_replacement_cost
-        
-        cumulative_savings[i] = cumulative_savings[i-1] + savings
+    yearly_savings = np.full(26, float(annual_savings))
+    yearly_savings[0] = 0
+    # Inverter replacement at year 10 (cost incurred at the start of year 10)
+    yearly_savings[10] -= inverter_replacement_cost
+    cumulative_savings = np.cumsum(yearly_savings)
     
     # Adjust for initial cost
     cumulative_net_savings = cumulative_savings - upfront_cost
     
-    df = pd.DataFrame({
-        'Year': years,
-        'Cumulative Net Savings (KSh)': cumulative_net_savings
-    })
-    
-    fig = px.line(df, x='Year', y='Cumulative Net Savings (KSh)', 
-                  title='Financial Timeline: Cumulative Net Savings Over 25 Years',
-                  labels={'Cumulative Net Savings (KSh)': 'Cumulative Net Savings (KSh)', 'Year': 'Year'},
-                  template='plotly_white')
+    # Arrays go straight to the trace; no DataFrame needed for a single line
+    fig = go.Figure(go.Scatter(
+        x=years,
+        y=cumulative_net_savings,
+        mode='lines',
+        showlegend=False,
+        hovertemplate='Year=%{x}<br>Cumulative Net Savings (KSh)=%{y}<extra></extra>'
+    ))
+    fig.update_layout(
+        title='Financial Timeline: Cumulative Net Savings Over 25 Years',
+        xaxis_title='Year',
+        yaxis_title='Cumulative Net Savings (KSh)',
+        template='plotly_white'
+    )
     
     # Mark payback point
     fig.add_trace(go.Scatter(
@@ -64,20 +64,29 @@ def create_financial_timeline(upfront_cost, annual_savings, payback_period, npv_
     
     return fig
 
+_COST_BREAKDOWN_LABELS = np.array(['Panels', 'Inverter', 'Battery (if included)', 'Installation', 'Other (Mounts, Cables, Permits)'], dtype=object)
+
 def create_cost_breakdown_pie(panel_cost, inverter_cost, battery_cost, installation_cost, other_cost):
     """Creates a Plotly pie chart for system cost breakdown."""
-    labels = ['Panels', 'Inverter', 'Battery (if included)', 'Installation', 'Other (Mounts, Cables, Permits)']
-    values = [panel_cost, inverter_cost, battery_cost, installation_cost, other_cost]
+    values = np.array([panel_cost, inverter_cost, battery_cost, installation_cost, other_cost], dtype=np.float64)
     
     # Filter out zero values for cleaner chart
-    data = [(l, v) for l, v in zip(labels, values) if v > 0]
-    labels, values = zip(*data)
+    shown = values > 0
+    if not shown.any():
+        return go.Figure().update_layout(title_text="System Cost Breakdown (KSh): no cost data", template='plotly_white')
     
-    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.3)])
+    fig = go.Figure(data=[go.Pie(labels=_COST_BREAKDOWN_LABELS[shown], values=values[shown], hole=.3)])
     fig.update_layout(title_text="System Cost Breakdown (KSh)", template='plotly_white')
     
     return fig
 
+def create_detailed_cost_pie(labels, values):
+    """Creates a Plotly donut chart for an itemized cost breakdown."""
+    values = np.asarray(values, dtype=np.float64)
+    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.3, textinfo='percent', sort=False)])
+    fig.update_layout(margin=dict(t=0, b=0, l=0, r=0))
+    return fig
+
 def create_co2_offset_gauge(annual_co2_offset_tons):
     """Creates a Plotly gauge chart for annual CO2 offset."""
     fig = go.Figure(go.Indicator(
@@ -109,18 +118,12 @@ def create_monthly_energy_flow(annual_generation_kwh, monthly_consumption_kwh):
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
     
     # Simplified: assume uniform consumption and generation for a first pass
-    monthly_consumption = [monthly_consumption_kwh] * 12
-    monthly_generation = [annual_generation_kwh / 12] * 12
-    
-    df = pd.DataFrame({
-        'Month': months,
-        'Consumption (kWh)': monthly_consumption,
-        'Generation (kWh)': monthly_generation
-    })
+    monthly_consumption = np.full(12, float(monthly_consumption_kwh))
+    monthly_generation = np.full(12, annual_generation_kwh / 12)
     
     fig = go.Figure(data=[
-        go.Bar(name='Consumption', x=df['Month'], y=df['Consumption (kWh)'], marker_color='blue'),
-        go.Bar(name='Generation', x=df['Month'], y=df['Generation (kWh)'], marker_color='orange')
+        go.Bar(name='Consumption', x=months, y=monthly_consumption, marker_color='blue'),
+        go.Bar(name='Generation', x=months, y=monthly_generation, marker_color='orange')
     ])
     
     fig.update_layout(barmode='group', title='Monthly Energy Flow (Consumption vs. Generation)', template='plotly_white')